@@ -0,0 +1,111 @@
+# db_connection.py
+#
+# Accès partagé à poker_bot.db : une connexion persistante par thread, en mode WAL.
+# Même fichier dans range_manager, Overlay et card _detector (applications compilées séparément).
+
+import contextlib
+import sqlite3
+import threading
+
+BUSY_TIMEOUT_MS = 5000  # Attente maximale quand un autre processus écrit
+STATEMENT_CACHE_SIZE = 128  # Requêtes préparées gardées par connexion
+
+_local = threading.local()
+
+
+def get_connection(db_path):
+    """
+    Connexion du thread courant à `db_path`, ouverte au premier appel puis réutilisée.
+
+    La connexion est en autocommit (chaque requête isolée est validée aussitôt) ; les
+    écritures groupées passent par `transaction`. Le mode WAL permet aux trois applications
+    de lire pendant qu'une autre écrit, et `busy_timeout` remplace les erreurs
+    "database is locked" par une courte attente.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(
+            db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        # En WAL, NORMAL ne synchronise le disque qu'aux checkpoints : écritures bien plus rapides
+        conn.execute("PRAGMA synchronous = NORMAL")
+        connections[db_path] = conn
+    return conn
+
+
+def execute(db_path, query, parameters=()):
+    """Exécute une requête sur la connexion du thread courant et retourne le curseur."""
+    return get_connection(db_path).execute(query, parameters)
+
+
+def executemany(db_path, query, rows):
+    """Exécute une requête pour chaque ligne de `rows`, dans une seule transaction."""
+    with transaction(db_path) as conn:
+        return conn.executemany(query, rows)
+
+
+def fetchone(db_path, query, parameters=()):
+    return execute(db_path, query, parameters).fetchone()
+
+
+def fetchall(db_path, query, parameters=()):
+    return execute(db_path, query, parameters).fetchall()
+
+
+@contextlib.contextmanager
+def transaction(db_path):
+    """
+    Transaction explicite : validée à la sortie du bloc, annulée en cas d'exception.
+    Les blocs imbriqués deviennent des SAVEPOINT de la transaction englobante.
+
+    Exemple :
+        with transaction(DB_PATH) as conn:
+            conn.execute("DELETE FROM overlay_table")
+            conn.executemany("INSERT INTO overlay_table ...", rows)
+    """
+    conn = get_connection(db_path)
+    if conn.in_transaction:
+        depth = getattr(_local, "savepoints", 0) + 1
+        _local.savepoints = depth
+        name = f"niveau_{depth}"
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            raise
+        else:
+            conn.execute(f"RELEASE {name}")
+        finally:
+            _local.savepoints = depth - 1
+        return
+
+    # IMMEDIATE : le verrou d'écriture est pris dès le début, pas au milieu de la transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def close_connection(db_path=None):
+    """Ferme la connexion du thread courant à `db_path` (toutes ses connexions si None)."""
+    connections = getattr(_local, "connections", {})
+    paths = list(connections) if db_path is None else [db_path]
+    for path in paths:
+        conn = connections.pop(path, None)
+        if conn is not None:
+            conn.close()
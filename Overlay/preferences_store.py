@@ -0,0 +1,40 @@
+from PyQt5.QtCore import QObject, QTimer
+from Overlay_database import get_user_preferences, update_user_preferences
+
+# Délai d'inactivité avant l'écriture des préférences (ms)
+SAVE_DELAY_MS = 500
+
+
+class PreferencesStore(QObject):
+    """
+    Préférences utilisateur gardées en mémoire, écrites en différé dans la base.
+
+    Chaque modification relance un minuteur : une série de changements rapides (curseur
+    déplacé à la souris) ne produit qu'une seule écriture, une fois l'utilisateur arrêté
+    pendant `SAVE_DELAY_MS`. `flush` force l'écriture (fermeture de la fenêtre).
+    """
+
+    def __init__(self, parent=None, delay_ms=SAVE_DELAY_MS):
+        super().__init__(parent)
+        self.values = tuple(get_user_preferences())
+        self.saved_values = self.values
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(delay_ms)
+        self.save_timer.timeout.connect(self.flush)
+
+    def update(self, site, style, nombre_tables, niveau_aide):
+        """Enregistre les nouvelles préférences en mémoire et programme leur écriture."""
+        self.values = (site, style, nombre_tables, niveau_aide)
+        if self.values == self.saved_values:
+            self.save_timer.stop()
+        else:
+            self.save_timer.start()  # Relance le délai à chaque changement
+
+    def flush(self):
+        """Écrit immédiatement les préférences si elles ont changé depuis la dernière écriture."""
+        self.save_timer.stop()
+        if self.values != self.saved_values:
+            update_user_preferences(*self.values)
+            self.saved_values = self.values
@@ -1,6 +1,6 @@
-import sqlite3
 import os
 import random
+from db_connection import execute, transaction
 
 # Chemin vers la base de données
 BASE_DIR = os.path.expanduser("~\\Documents\\Némésia Poker Suite")
@@ -21,61 +21,60 @@ DEFAULT_CHILD_SIZES = {
 # Fonctions pour gérer les rectangles
 def create_overlay_table():
     """Crée la table overlay_table pour stocker les rectangles."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS overlay_table (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id INTEGER NOT NULL,
-                site TEXT NOT NULL,
-                style TEXT NOT NULL,
-                label TEXT NOT NULL,
-                x INTEGER NOT NULL,
-                y INTEGER NOT NULL,
-                width INTEGER NOT NULL,
-                height INTEGER NOT NULL
-            )
-        ''')
-        conn.commit()
-        print("Table 'overlay_table' créée ou existante.")
+    execute(DB_PATH, '''
+        CREATE TABLE IF NOT EXISTS overlay_table (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id INTEGER NOT NULL,
+            site TEXT NOT NULL,
+            style TEXT NOT NULL,
+            label TEXT NOT NULL,
+            x INTEGER NOT NULL,
+            y INTEGER NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL
+        )
+    ''')
+    # Les layouts sont toujours lus par site et style, puis par table
+    execute(DB_PATH, '''
+        CREATE INDEX IF NOT EXISTS idx_overlay_table_layout
+        ON overlay_table (site, style, table_id, label)
+    ''')
+    print("Table 'overlay_table' créée ou existante.")
+
+def _default_rectangle_rows():
+    """Rectangles par défaut (positions aléatoires) : un parent "table" et ses enfants, par site, style et table."""
+    for site in ["Winamax", "PokerStars", "Unibet"]:
+        for style in ["Heads-Up", "5-Max", "6-Max", "9-Max", "Tournoi"]:
+            for table_id in range(1, 7):
+                # Rectangle parent "table"
+                parent_x = random.randint(0, 300)
+                parent_y = random.randint(0, 300)
+                yield (table_id, site, style, "table", parent_x, parent_y, DEFAULT_PARENT_WIDTH, DEFAULT_PARENT_HEIGHT)
+
+                # Rectangles enfants
+                for category in RECTANGLE_CATEGORIES:
+                    count = 2 if category != "flop_turn_river" else 5
+                    for i in range(count):
+                        rel_x = random.randint(10, 100)
+                        rel_y = random.randint(10, 100)
+                        width, height = DEFAULT_CHILD_SIZES[category]
+                        x = parent_x + rel_x
+                        y = parent_y + rel_y
+                        label = f"{category}_{i+1}"
+                        yield (table_id, site, style, label, x, y, width, height)
 
 def initialize_default_rectangles():
     """Initialise les rectangles avec des valeurs par défaut aléatoires."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-
+    # Une seule transaction : la table n'est jamais visible à moitié remplie
+    with transaction(DB_PATH) as conn:
         # Nettoyer les rectangles existants pour recommencer à zéro
-        cursor.execute("DELETE FROM overlay_table")
-
-        for site in ["Winamax", "PokerStars", "Unibet"]:
-            for style in ["Heads-Up", "5-Max", "6-Max", "9-Max", "Tournoi"]:
-                for table_id in range(1, 7):
-                    # Rectangle parent "table"
-                    parent_x = random.randint(0, 300)
-                    parent_y = random.randint(0, 300)
-                    cursor.execute('''
-                        INSERT INTO overlay_table (table_id, site, style, label, x, y, width, height)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (table_id, site, style, "table", parent_x, parent_y, DEFAULT_PARENT_WIDTH, DEFAULT_PARENT_HEIGHT))
-
-                    # Rectangles enfants
-                    for category in RECTANGLE_CATEGORIES:
-                        count = 2 if category != "flop_turn_river" else 5
-                        for i in range(count):
-                            rel_x = random.randint(10, 100)
-                            rel_y = random.randint(10, 100)
-                            width, height = DEFAULT_CHILD_SIZES[category]
-                            x = parent_x + rel_x
-                            y = parent_y + rel_y
-                            label = f"{category}_{i+1}"
-
-                            cursor.execute('''
-                                INSERT INTO overlay_table (table_id, site, style, label, x, y, width, height)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (table_id, site, style, label, x, y, width, height))
+        conn.execute("DELETE FROM overlay_table")
+        conn.executemany('''
+            INSERT INTO overlay_table (table_id, site, style, label, x, y, width, height)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _default_rectangle_rows())
 
-        conn.commit()
-        print("Rectangles initiaux insérés avec succès.")
+    print("Rectangles initiaux insérés avec succès.")
 
 if __name__ == "__main__":
     create_overlay_table()
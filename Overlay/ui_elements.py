@@ -7,33 +7,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont, QFontDatabase
 from PyQt5.QtCore import Qt
 from styles import load_stylesheet, get_slider_style, get_selected_button_style, get_unselected_button_style
-from Overlay_database import get_user_preferences, update_user_preferences
-import sqlite3
-import os
-
-# Chemin vers la base de données
-BASE_DIR = os.path.expanduser("~\\Documents\\Némésia Poker Suite")
-DB_PATH = os.path.join(BASE_DIR, "poker_bot.db")
-
-def create_overlay_table():
-    """Vérifie si la table overlay_table existe, sinon la crée."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS overlay_table (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                table_id INTEGER NOT NULL,
-                site TEXT NOT NULL,
-                style TEXT NOT NULL,
-                label TEXT NOT NULL,
-                x INTEGER NOT NULL,
-                y INTEGER NOT NULL,
-                width INTEGER NOT NULL,
-                height INTEGER NOT NULL
-            )
-        ''')
-        conn.commit()
-        print("Table 'overlay_table' vérifiée/créée.")
+from preferences_store import PreferencesStore
+from rectangles_tables import create_overlay_table
 
 # Créer la table au lancement de l'application
 create_overlay_table()
@@ -48,8 +23,9 @@ class NemesiaPokerSuite(QMainWindow):
         self.setStyleSheet(load_stylesheet())
         self.font_family = self.load_font()
 
-        # Chargement des préférences utilisateur
-        self.user_site, self.user_style, self.user_tables, self.user_aide = get_user_preferences()
+        # Chargement des préférences utilisateur (écrites en différé, voir `PreferencesStore`)
+        self.preferences = PreferencesStore(self)
+        self.user_site, self.user_style, self.user_tables, self.user_aide = self.preferences.values
 
         self.styles_by_site = {
             "Winamax": ["Heads Up", "5 Max", "6 Max", "9 Max", "Escape", "Tournoi"],
@@ -211,7 +187,12 @@ class NemesiaPokerSuite(QMainWindow):
         self.update_preferences_db()
 
     def update_preferences_db(self):
-        update_user_preferences(self.user_site, self.user_style, self.user_tables, self.user_aide)
+        self.preferences.update(self.user_site, self.user_style, self.user_tables, self.user_aide)
+
+    def closeEvent(self, event):
+        # Écrit les préférences encore en attente avant de quitter (ou de lancer l'overlay)
+        self.preferences.flush()
+        super().closeEvent(event)
 
     def clear_style_buttons(self):
         for btn in self.style_buttons.values():
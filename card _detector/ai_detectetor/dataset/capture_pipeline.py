@@ -0,0 +1,176 @@
+# capture_pipeline.py
+#
+# Capture des zones hors du thread de l'interface : un producteur (capture) alimente des
+# consommateurs (enregistrement, classification) par des files bornées.
+# Même fichier dans card _detector et ai_detectetor/dataset (scripts lancés séparément).
+
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from screen_capture import ChangeDetector, grab_regions
+
+DEFAULT_QUEUE_SIZE = 2
+
+
+class DroppingQueue:
+    """
+    File bornée : quand elle est pleine, l'élément le plus ancien est abandonné au profit
+    du nouveau. Un consommateur lent travaille donc toujours sur des captures récentes,
+    sans que la mémoire ni le retard n'augmentent.
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE):
+        self.items = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self):
+        """Prochain élément (bloquant), ou None une fois la file fermée et vidée."""
+        with self.condition:
+            while not self.items and not self.closed:
+                self.condition.wait()
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ZoneConsumer(QThread):
+    """
+    Consommateur de captures : appelle `function(timestamp, zones)` pour chaque capture
+    reçue, dans son propre thread. Un résultat différent de None est transmis par `processed`
+    (reçu dans le thread de l'interface).
+    """
+
+    processed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, function, queue_size=DEFAULT_QUEUE_SIZE, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.queue = DroppingQueue(queue_size)
+        self.processed_count = 0
+
+    @property
+    def dropped(self):
+        """Captures abandonnées parce que ce consommateur était en retard."""
+        return self.queue.dropped
+
+    def run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            try:
+                result = self.function(*frame)
+            except Exception as e:
+                self.failed.emit(str(e))
+                continue
+            self.processed_count += 1
+            if result is not None:
+                self.processed.emit(result)
+
+
+class CaptureWorker(QThread):
+    """
+    Producteur : capture les zones toutes les `interval_ms` et distribue chaque capture
+    (timestamp, {clé: zone RGB}) à la file de chaque consommateur.
+
+    Seules les zones qui ont changé depuis leur dernière transmission sont distribuées
+    (`ChangeDetector`) ; une capture sans aucune zone modifiée n'est pas distribuée du tout.
+    `detect_changes=False` transmet toutes les zones à chaque capture.
+
+    Chaque capture possède ses propres tableaux (`grab_regions` en alloue de nouveaux à
+    chaque fois) : une capture en attente dans une file ou en cours de traitement n'est
+    jamais modifiée par les captures suivantes.
+    """
+
+    def __init__(self, interval_ms, queue_size=DEFAULT_QUEUE_SIZE, detect_changes=True, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.queue_size = queue_size
+        self.change_detector = ChangeDetector() if detect_changes else None
+        self.consumers = []
+        self.regions = {}
+        self.moved = set()  # Zones déplacées depuis la dernière capture
+        self.lock = threading.Lock()
+        self.paused = False
+        self.stopping = threading.Event()
+        self.captured_count = 0
+
+    def add_consumer(self, function):
+        """Ajoute et démarre un consommateur `function(timestamp, zones)` ; retourne le `ZoneConsumer`."""
+        consumer = ZoneConsumer(function, self.queue_size, parent=self.parent())
+        self.consumers.append(consumer)
+        consumer.start()
+        return consumer
+
+    def set_regions(self, regions):
+        """Zones à capturer : {clé: (x, y, largeur, hauteur)} (appelable depuis l'interface)."""
+        regions = dict(regions)
+        with self.lock:
+            self.moved.update(key for key, region in self.regions.items() if regions.get(key) != region)
+            self.regions = regions
+
+    def set_paused(self, paused):
+        self.paused = paused
+
+    def run(self):
+        next_capture = time.perf_counter()
+        while not self.stopping.wait(max(0.0, next_capture - time.perf_counter())):
+            # Une capture en retard n'est pas rattrapée par une rafale : on repart de maintenant
+            next_capture = max(next_capture + self.interval, time.perf_counter())
+            if self.paused:
+                continue
+            with self.lock:
+                regions, moved = self.regions, self.moved
+                self.moved = set()
+            if not regions:
+                continue
+            zones = {
+                key: zone
+                for key, zone in zip(regions, grab_regions(regions.values()))
+                if zone is not None
+            }
+            self.captured_count += 1
+            if self.change_detector is not None:
+                # Une zone déplacée ou redimensionnée est retransmise même si son contenu est identique
+                self.change_detector.forget(moved)
+                # Seules les zones modifiées sont copiées hors de la capture : les captures sans
+                # changement sont libérées aussitôt, et une capture en file ne retient pas tout le
+                # rectangle englobant pour une seule zone modifiée
+                zones = {key: zone.copy() for key, zone in self.change_detector.filter(zones).items()}
+            if not zones:
+                continue  # Rien n'a changé : aucun traitement à faire
+            frame = (time.time(), zones)
+            for consumer in self.consumers:
+                consumer.queue.put(frame)
+
+    def stop(self):
+        """Arrête la capture puis les consommateurs (après les captures déjà en file)."""
+        self.stopping.set()
+        self.wait()
+        for consumer in self.consumers:
+            consumer.queue.close()
+            consumer.wait()
+        if not self.captured_count:
+            return
+        print(f"{self.captured_count} captures :")
+        for consumer in self.consumers:
+            name = getattr(consumer.function, "__name__", "consommateur")
+            print(f"{name} : {consumer.processed_count} traitées, {consumer.dropped} abandonnées (retard)")
+        if self.change_detector is not None:
+            print(self.change_detector.summary())
@@ -3,13 +3,12 @@ import os
 import json
 import cv2
 import numpy as np
-import time
 import torch
 import torchvision.models as models
-from PIL import ImageGrab
+from capture_pipeline import CaptureWorker
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
-from PyQt5.QtCore import Qt, QRect, QTimer
+from PyQt5.QtCore import Qt, QRect
 
 # Chemin du modèle
 MODEL_PATH = r"C:\Users\conta\Documents\python\model_efficientnet_finetuned.pth"
@@ -45,9 +44,15 @@ class CardCaptureOverlay(QMainWindow):
         # Chargement des rectangles
         self.rectangles = self.load_config()
 
-        # Timers
-        self.capture_timer = QTimer(self)
-        self.capture_timer.timeout.connect(self.capture_rectangles)
+        # Capture toutes les secondes dans un thread dédié (en pause jusqu'à Play) ; l'enregistrement
+        # et la classification tournent chacun dans leur thread, les prédictions reviennent par signal
+        self.capture_worker = CaptureWorker(interval_ms=1000, parent=self)
+        self.capture_worker.set_regions(self.regions())
+        self.capture_worker.set_paused(True)
+        self.capture_worker.add_consumer(self.save_zones)
+        self.classifier = self.capture_worker.add_consumer(self.classify_zones)
+        self.classifier.processed.connect(self.show_predictions)
+        self.capture_worker.start()
 
         # Boutons Play/Pause
         self.play_button = QPushButton("Play", self)
@@ -101,13 +106,13 @@ class CardCaptureOverlay(QMainWindow):
     def toggle_capture(self):
         """Démarre ou arrête la capture."""
         if self.is_recording:
-            self.capture_timer.stop()
+            self.capture_worker.set_paused(True)
             self.is_recording = False
             self.recording_label.setText("En pause")
             self.recording_label.setStyleSheet("color: red; font-weight: bold;")
             self.play_button.setText("Play")
         else:
-            self.capture_timer.start(1000)
+            self.capture_worker.set_paused(False)
             self.is_recording = True
             self.recording_label.setText("En cours")
             self.recording_label.setStyleSheet("color: green; font-weight: bold;")
@@ -136,23 +141,29 @@ class CardCaptureOverlay(QMainWindow):
         new_rect = QRect(x, y, default_width, default_height)
         self.rectangles.append(new_rect)
         self.save_config()  # Met à jour config.json
+        self.capture_worker.set_regions(self.regions())
         self.update()  # Redessine la fenêtre
         print(f"Rectangle ajouté : {new_rect}")
 
-    def capture_rectangles(self):
-        """Capture les rectangles définis."""
-        screenshot = ImageGrab.grab()
-        screenshot_np = np.array(screenshot)
+    def regions(self):
+        """Zones à capturer : {indice du rectangle: (x, y, largeur, hauteur)}."""
+        return {i: (rect.x(), rect.y(), rect.width(), rect.height()) for i, rect in enumerate(self.rectangles)}
 
-        for i, rect in enumerate(self.rectangles):
-            x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
-            if w <= 0 or h <= 0:
-                continue
-
-            cropped = screenshot_np[y:y + h, x:x + w]
-            temp_filename = os.path.join(BASE_DIR, f"capture_{time.time():.6f}.jpeg")
+    def save_zones(self, timestamp, zones):
+        """Enregistre les zones capturées (appelé dans le thread d'enregistrement)."""
+        for i, cropped in zones.items():
+            temp_filename = os.path.join(BASE_DIR, f"capture_{timestamp:.6f}_{i}.jpeg")
             cv2.imwrite(temp_filename, cv2.cvtColor(cropped, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
 
+    def classify_zones(self, timestamp, zones):
+        """Prédit la classe de chaque zone capturée (appelé dans le thread de classification)."""
+        return {i: self.predict_array(cv2.cvtColor(cropped, cv2.COLOR_RGB2BGR)) for i, cropped in zones.items()}
+
+    def show_predictions(self, predictions):
+        """Reçoit les prédictions dans le thread de l'interface."""
+        for i, prediction in predictions.items():
+            print(f"Rectangle {i} : {prediction}")
+
     def process_captures(self):
         """Traite les captures en fonction des prédictions."""
         for file in os.listdir(BASE_DIR):
@@ -180,7 +191,10 @@ class CardCaptureOverlay(QMainWindow):
         if image is None:
             print(f"Impossible de lire l'image : {image_path}")
             return "non_cartes"  # Classe par défaut pour éviter les erreurs
+        return self.predict_array(image)
 
+    def predict_array(self, image):
+        """Effectue une prédiction sur une image BGR (h, w, 3) déjà en mémoire."""
         image = cv2.resize(image, (224, 224))  # Assurez-vous que la taille est correcte pour le modèle
         image = np.transpose(image, (2, 0, 1))  # CHW format
         image = torch.tensor(image, dtype=torch.float32).unsqueeze(0) / 255.0
@@ -192,6 +206,11 @@ class CardCaptureOverlay(QMainWindow):
             _, predicted = torch.max(outputs, 1)
         return str(predicted.item())
 
+    def closeEvent(self, event):
+        # Termine les captures, enregistrements et prédictions en cours avant de quitter
+        self.capture_worker.stop()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
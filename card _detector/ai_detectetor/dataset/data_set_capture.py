@@ -2,9 +2,7 @@ import sys
 import os
 import json
 import cv2
-import numpy as np
-import time
-from PIL import ImageGrab  # Pour remplacer pyautogui.screenshot
+from capture_pipeline import CaptureWorker
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
 from PyQt5.QtCore import Qt, QRect, QTimer
@@ -51,10 +49,11 @@ class CardCaptureOverlay(QMainWindow):
         # Rendre les boutons repositionnables
         self.dragging_button = None
 
-        # Timer pour captures automatiques
-        self.capture_timer = QTimer(self)
-        self.capture_timer.timeout.connect(self.capture_rectangles)
-        self.capture_timer.start(2000)  # Capture toutes les 2 secondes
+        # Captures automatiques toutes les 2 secondes, enregistrées hors du thread de l'interface
+        self.capture_worker = CaptureWorker(interval_ms=2000, parent=self)
+        self.capture_worker.set_regions(self.regions())
+        self.capture_worker.add_consumer(self.save_zones)
+        self.capture_worker.start()
 
         # Timer pour le clic simulé
         self.click_timer = QTimer(self)
@@ -87,23 +86,15 @@ class CardCaptureOverlay(QMainWindow):
         for rect in self.rectangles:
             painter.drawRect(rect)
 
-    def capture_rectangles(self):
-        """Capture les zones définies par les rectangles."""
-        screenshot = ImageGrab.grab()  # Utilisé à la place de pyautogui.screenshot
-        screenshot_np = np.array(screenshot)
-
-        for i, rect in enumerate(self.rectangles):
-            x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
-            print(f"Rectangle {i}: x={x}, y={y}, width={w}, height={h}")
-
-            if w <= 0 or h <= 0:
-                print(f"Rectangle {i} ignoré (dimensions invalides : width={w}, height={h})")
-                continue
-
-            cropped = screenshot_np[y:y + h, x:x + w]
+    def regions(self):
+        """Zones à capturer : {indice du rectangle: (x, y, largeur, hauteur)}."""
+        return {i: (rect.x(), rect.y(), rect.width(), rect.height()) for i, rect in enumerate(self.rectangles)}
 
+    def save_zones(self, timestamp, zones):
+        """Enregistre les zones capturées (appelé dans le thread d'enregistrement)."""
+        for i, cropped in zones.items():
             # Sauvegarder l'image directement dans le dossier
-            filename = os.path.join(DATASET_DIR, f"capture_{int(time.time())}_{i}.jpeg")
+            filename = os.path.join(DATASET_DIR, f"capture_{int(timestamp)}_{i}.jpeg")
             cv2.imwrite(filename, cv2.cvtColor(cropped, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
             print(f"Image sauvegardée : {filename}")
 
@@ -124,6 +115,7 @@ class CardCaptureOverlay(QMainWindow):
         new_rect = QRect(x, y, default_width, default_height)
         self.rectangles.append(new_rect)
         self.save_config()
+        self.capture_worker.set_regions(self.regions())
         self.update()
 
     def remove_rectangle(self):
@@ -131,8 +123,14 @@ class CardCaptureOverlay(QMainWindow):
         if self.rectangles:
             self.rectangles.pop()
             self.save_config()
+            self.capture_worker.set_regions(self.regions())
             self.update()
 
+    def closeEvent(self, event):
+        # Termine les captures et les enregistrements en cours avant de quitter
+        self.capture_worker.stop()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
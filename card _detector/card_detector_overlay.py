@@ -1,12 +1,16 @@
 import sys
+import logging
 import cv2
-import numpy as np
 from PyQt5.QtWidgets import QApplication, QMainWindow
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
-from PyQt5.QtCore import Qt, QRect, QTimer
-import pyautogui
+from PyQt5.QtCore import Qt, QRect
 from database_cd import DatabaseManager
+from persistence_worker import PersistenceWorker
 from temp_file_manager import TempFileManager
+from capture_pipeline import CaptureWorker
+
+# Debug : écrit chaque zone capturée en PNG dans le dossier temporaire (désactivé en temps normal)
+DUMP_CROPS = False
 
 
 class CardDetectorOverlay(QMainWindow):
@@ -27,6 +31,12 @@ class CardDetectorOverlay(QMainWindow):
         # Initialisation de la base de données
         self.db_manager = DatabaseManager()
 
+        # Les rectangles déplacés sont enregistrés en arrière-plan (dernière position par label)
+        self.persistence = PersistenceWorker(self)
+        self.persistence.failed.connect(
+            lambda label, error: logging.error(f"Échec de l'enregistrement du rectangle {label} : {error}")
+        )
+
         # Charger les rectangles depuis la base de données
         loaded_rectangles = self.db_manager.load_rectangles()
         self.rectangles = [
@@ -51,11 +61,14 @@ class CardDetectorOverlay(QMainWindow):
         self.resizing = False
         self.start_pos = None
 
-        # Timer pour capture des zones
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.capture_zones)
-        self.captures_enabled = True  # Contrôle des captures
-        self.timer.start(1000)  # Capture toutes les secondes
+        # Capture des zones toutes les secondes, dans un thread dédié : l'interface reste fluide
+        # pendant le déplacement des rectangles, même si les traitements sont lents
+        self.capture_worker = CaptureWorker(interval_ms=1000, parent=self)
+        self.capture_worker.set_regions(self.zone_regions())
+        self.dump_crops = DUMP_CROPS
+        if self.dump_crops:
+            self.add_zone_consumer(self.dump_zones)
+        self.capture_worker.start()
 
     def paintEvent(self, event):
         # Dessiner les rectangles et leurs labels
@@ -91,7 +104,6 @@ class CardDetectorOverlay(QMainWindow):
                     self.dragging = True
                 elif event.button() == Qt.RightButton:
                     self.resizing = True
-                self.captures_enabled = False  # Désactiver les captures pendant l'interaction
                 break
 
     def mouseMoveEvent(self, event):
@@ -121,35 +133,45 @@ class CardDetectorOverlay(QMainWindow):
             for item in self.rectangles:
                 if item["rect"] == self.active_rectangle:
                     rect = item["rect"]
-                    self.db_manager.save_rectangle(
+                    self.persistence.submit(
+                        item["label"], self.db_manager.save_rectangle,
                         item["label"], rect.x(), rect.y(), rect.width(), rect.height()
                     )
         self.dragging = False
         self.resizing = False
         self.active_rectangle = None
-        self.captures_enabled = True  # Réactiver les captures après l'interaction
-
-    def capture_zones(self):
-        if not self.captures_enabled:
-            return  # Ne rien faire si les captures sont désactivées
-
-        # Capture l'écran
-        screenshot = pyautogui.screenshot()
-        screenshot_np = np.array(screenshot)
-
-        # Extraire les zones définies par les rectangles
-        for i, item in enumerate(self.rectangles):
-            rect = item["rect"]
-            x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
-            cropped_zone = screenshot_np[y:y+h, x:x+w]
-
-            # Sauvegarder temporairement
-            temp_filename = f"zone_{item['label']}.png"
-            file_path = TempFileManager.save_temp_file(temp_filename, cv2.imencode('.png', cropped_zone)[1].tobytes())
-            print(f"Zone {item['label']} capturée temporairement : {file_path}")
-
-            # Supprimer après traitement
-            TempFileManager.delete_temp_file(file_path)
+        # Les captures suivent les rectangles une fois l'interaction terminée
+        self.capture_worker.set_regions(self.zone_regions())
+
+    def closeEvent(self, event):
+        # Termine les captures et les enregistrements en attente avant de quitter
+        self.capture_worker.stop()
+        self.persistence.stop()
+        super().closeEvent(event)
+
+    def zone_regions(self):
+        """Zones à capturer : {label: (x, y, largeur, hauteur)}."""
+        return {
+            item["label"]: (item["rect"].x(), item["rect"].y(), item["rect"].width(), item["rect"].height())
+            for item in self.rectangles
+        }
+
+    def add_zone_consumer(self, function):
+        """
+        Branche un traitement `function(timestamp, zones)` sur les captures, exécuté dans son
+        propre thread. `zones` = {label: zone RGB (h, w, 3)} pour les seules zones qui ont changé
+        depuis leur dernière transmission ; chaque capture a ses propres tableaux, qui peuvent
+        être conservés. Le résultat (si non None) est émis par le signal
+        `processed` du consommateur retourné, reçu dans le thread de l'interface.
+        """
+        return self.capture_worker.add_consumer(function)
+
+    def dump_zones(self, timestamp, zones):
+        """Debug : enregistre les zones capturées en PNG dans le dossier temporaire."""
+        for label, cropped_zone in zones.items():
+            png = cv2.imencode('.png', cv2.cvtColor(cropped_zone, cv2.COLOR_RGB2BGR))[1].tobytes()
+            file_path = TempFileManager.save_temp_file(f"zone_{label}.png", png)
+            print(f"Zone {label} enregistrée : {file_path}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import os
-import sqlite3
 import logging
+from db_connection import execute, fetchall, get_connection
 
 # Chemins constants
 BASE_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Némésia Poker Suite")
@@ -33,16 +33,13 @@ class DatabaseManager:
         """Vérifie que la base de données existe, sinon la crée."""
         if not os.path.exists(DB_PATH):
             logging.info(f"Base de données non trouvée. Création de {DB_PATH}...")
-            conn = sqlite3.connect(DB_PATH)
-            conn.close()
+            get_connection(DB_PATH)
         else:
             logging.info(f"Base de données existante : {DB_PATH}")
 
     def ensure_table_exists(self):
         """Vérifie que la table CD_Rectangle existe, sinon la crée."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
+        execute(DB_PATH, """
             CREATE TABLE IF NOT EXISTS CD_Rectangle (
                 label TEXT PRIMARY KEY,
                 x INTEGER NOT NULL,
@@ -51,15 +48,11 @@ class DatabaseManager:
                 height INTEGER NOT NULL
             )
         """)
-        conn.commit()
-        conn.close()
         logging.info("Table CD_Rectangle vérifiée/créée.")
 
     def save_rectangle(self, label, x, y, width, height):
         """Enregistre ou met à jour un rectangle dans la base de données."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
+        execute(DB_PATH, """
             INSERT INTO CD_Rectangle (label, x, y, width, height)
             VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(label) DO UPDATE SET
@@ -68,16 +61,10 @@ class DatabaseManager:
             width = excluded.width,
             height = excluded.height
         """, (label, x, y, width, height))
-        conn.commit()
-        conn.close()
         logging.info(f"Rectangle enregistré : {label} (x={x}, y={y}, w={width}, h={height})")
 
     def load_rectangles(self):
         """Charge les rectangles depuis la base de données."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT label, x, y, width, height FROM CD_Rectangle")
-        rows = cursor.fetchall()
-        conn.close()
+        rows = fetchall(DB_PATH, "SELECT label, x, y, width, height FROM CD_Rectangle")
         logging.info("Rectangles chargés depuis la base de données.")
         return rows
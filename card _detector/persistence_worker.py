@@ -0,0 +1,64 @@
+# persistence_worker.py
+#
+# Écritures en base hors du thread de l'interface Qt.
+# Même fichier dans range_manager et card _detector (applications compilées séparément).
+
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from db_connection import close_connection
+
+
+class PersistenceWorker(QThread):
+    """
+    Thread d'écriture : reçoit des demandes (clé, fonction, arguments) et les exécute dans
+    l'ordre d'arrivée, loin de la boucle d'événements.
+
+    Les demandes sont regroupées par clé : si une écriture pour la même clé (ex: le même
+    rectangle) attend encore, elle est remplacée par la plus récente, et seule la dernière
+    valeur est écrite. La fin de chaque écriture est signalée par `saved` (ou `failed`),
+    reçus dans le thread de l'interface.
+    """
+
+    saved = pyqtSignal(object)  # clé
+    failed = pyqtSignal(object, str)  # clé, message d'erreur
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.stopping = False
+
+    def submit(self, key, function, *args):
+        """Programme `function(*args)` ; remplace une demande encore en attente pour `key`."""
+        with self.condition:
+            self.pending[key] = (function, args)
+            self.condition.notify()
+        if not self.stopping:
+            self.start()  # Sans effet si le thread tourne déjà
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if not self.pending:
+                    break  # Arrêt demandé et plus rien à écrire
+                key, (function, args) = self.pending.popitem(last=False)
+            try:
+                function(*args)
+            except Exception as e:
+                self.failed.emit(key, str(e))
+            else:
+                self.saved.emit(key)
+        # Les connexions SQLite appartiennent à ce thread : elles sont fermées avec lui
+        close_connection()
+
+    def stop(self):
+        """Écrit les demandes en attente puis arrête le thread (à appeler à la fermeture)."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
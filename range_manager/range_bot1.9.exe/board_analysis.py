@@ -0,0 +1,240 @@
+# board_analysis.py
+
+import itertools
+import time
+
+import numpy as np
+
+from hand_evaluator import cards_mask, parse_cards
+from range_calculator import Range, COMBO_CARDS, COMBO_CARD_MASKS
+
+# Catégories de mains faites (de la plus forte à la plus faible)
+MADE_HAND_NAMES = [
+    "Quinte flush", "Carré", "Full", "Couleur", "Quinte", "Set", "Brelan", "Double paire",
+    "Overpair", "Top pair", "Paire moyenne", "Petite paire", "Hauteur",
+]
+(STRAIGHT_FLUSH, QUADS, FULL_HOUSE, FLUSH, STRAIGHT, SET, TRIPS, TWO_PAIR,
+ OVERPAIR, TOP_PAIR, MIDDLE_PAIR, WEAK_PAIR, HIGH_CARD) = range(len(MADE_HAND_NAMES))
+
+# Tirages, sous forme de drapeaux combinables
+DRAW_NAMES = ["Tirage couleur", "Tirage quinte bilatéral", "Tirage ventral", "Overcards", "Backdoor couleur"]
+FLUSH_DRAW, OPEN_ENDED, GUTSHOT, OVERCARDS, BACKDOOR_FLUSH = (1 << i for i in range(len(DRAW_NAMES)))
+
+_STRAIGHT_PATTERNS = [0b1111100000000 >> shift for shift in range(9)] + [0b1000000001111]
+
+
+def _build_straight_tables():
+    """
+    Tables indexées par un masque 13 bits de rangs :
+    - présence d'une quinte ;
+    - masque des rangs qui compléteraient une quinte (tirages).
+    """
+    has_straight = np.zeros(1 << 13, dtype=bool)
+    for bits in range(1 << 13):
+        has_straight[bits] = any(bits & pattern == pattern for pattern in _STRAIGHT_PATTERNS)
+    completing_ranks = np.zeros(1 << 13, dtype=np.int16)
+    for bits in np.flatnonzero(~has_straight):
+        completing_ranks[bits] = sum(1 << rank for rank in range(13) if has_straight[bits | 1 << rank])
+    return has_straight, completing_ranks
+
+
+HAS_STRAIGHT, COMPLETING_RANKS = _build_straight_tables()
+BIT_COUNTS = np.array([bin(bits).count("1") for bits in range(1 << 13)], dtype=np.int8)
+
+
+def _card_counts(cards, width, values=None):
+    """
+    Compte (ou combine par OU binaire lorsque `values` est donné) les cartes de chaque ligne
+    de `cards` (N, k) dans `width` colonnes, selon l'index de colonne fourni.
+    """
+    rows = np.broadcast_to(np.arange(len(cards))[:, None], cards.shape)
+    if values is None:
+        counts = np.zeros((len(cards), width), dtype=np.int8)
+        np.add.at(counts, (rows, cards), 1)
+    else:
+        counts = np.zeros((len(cards), width), dtype=np.int16)
+        np.bitwise_or.at(counts, (rows, cards), values.astype(np.int16))
+    return counts
+
+
+# Répartition des deux cartes de chaque combinaison par rang et par couleur
+HOLE_RANKS = COMBO_CARDS.astype(np.int64) // 4
+HOLE_RANK_COUNTS = _card_counts(HOLE_RANKS, 13)
+HOLE_SUIT_COUNTS = _card_counts(COMBO_CARDS % 4, 4)
+HOLE_SUIT_BITS = _card_counts(COMBO_CARDS % 4, 4, np.left_shift(1, HOLE_RANKS))
+HOLE_RANK_BITS = np.bitwise_or.reduce(np.left_shift(1, HOLE_RANKS), axis=1).astype(np.int16)
+HOLE_LOW = HOLE_RANKS.min(axis=1)
+IS_POCKET_PAIR = HOLE_RANKS[:, 0] == HOLE_RANKS[:, 1]
+
+
+def available_combos(board, dead=()):
+    """Tableau booléen (1326,) des combinaisons encore possibles avec ce board et ces cartes mortes."""
+    known_mask = cards_mask(board) | cards_mask(dead)
+    return (COMBO_CARD_MASKS & known_mask) == 0
+
+
+def narrow_range(hand_range, board, dead=()):
+    """Retire d'un range (ex: issu de `database_range.load_range`) les combinaisons bloquées."""
+    weights = Range.from_hands(hand_range).weights * available_combos(board, dead)
+    return Range.from_weights(weights)
+
+
+def classify(boards, combos=None):
+    """
+    Classe les 1326 combinaisons (ou le sous-ensemble `combos`) sur un ou plusieurs boards
+    (3 à 5 cartes), en une passe vectorisée.
+
+    Args:
+        boards: Un board (ex: "AhKd7c" ou liste d'index) ou un tableau (F, n) d'index de cartes.
+        combos (np.ndarray, optional): Index des combinaisons à classer (N), toutes par défaut.
+
+    Returns:
+        tuple: (mains faites (F, N) int8, drapeaux de tirage (F, N) uint8, combos valides (F, N) bool).
+               Les dimensions F sont retirées pour un board unique ; mains faites = -1 si le combo est bloqué.
+    """
+    combos = slice(None) if combos is None else np.asarray(combos)
+    hole_rank_counts = HOLE_RANK_COUNTS[combos]
+    hole_suit_counts = HOLE_SUIT_COUNTS[combos]
+
+    single = isinstance(boards, str) or np.ndim(boards) == 1
+    boards = np.atleast_2d(np.array([parse_cards(boards)] if single else boards, dtype=np.int64))
+    board_size = boards.shape[1]
+
+    board_ranks, board_suits = boards // 4, boards % 4
+    board_rank_counts = _card_counts(board_ranks, 13)
+    board_suit_counts = _card_counts(board_suits, 4)
+    board_suit_bits = _card_counts(board_suits, 4, np.left_shift(1, board_ranks))
+    board_bits = np.bitwise_or.reduce(np.left_shift(1, board_ranks), axis=1).astype(np.int16)
+    board_masks = np.bitwise_or.reduce(np.left_shift(1, boards), axis=1)
+    valid = (COMBO_CARD_MASKS[combos][None, :] & board_masks[:, None]) == 0
+
+    # Rangs : comptes totaux et implication des cartes du joueur
+    rank_counts = board_rank_counts[:, None, :] + hole_rank_counts[None, :, :]
+    hero_ranks = hole_rank_counts[None, :, :] > 0
+    bits = board_bits[:, None] | HOLE_RANK_BITS[combos][None, :]
+    top_board = board_ranks.max(axis=1)
+    distinct = np.sort(np.where(board_rank_counts > 0, np.arange(13), -1), axis=1)[:, ::-1]
+    second_board = distinct[:, 1]
+
+    # Couleurs
+    suit_counts = board_suit_counts[:, None, :] + hole_suit_counts[None, :, :]
+    flush_suit = suit_counts.argmax(axis=2)
+    best_suit_count = np.take_along_axis(suit_counts, flush_suit[:, :, None], axis=2)[:, :, 0]
+    hero_in_suit = np.take_along_axis(
+        np.broadcast_to(hole_suit_counts[None], suit_counts.shape), flush_suit[:, :, None], axis=2
+    )[:, :, 0] > 0
+    suit_bits = np.take_along_axis(
+        board_suit_bits[:, None, :] | HOLE_SUIT_BITS[combos][None, :, :], flush_suit[:, :, None], axis=2
+    )[:, :, 0]
+
+    flush = (best_suit_count >= 5) & hero_in_suit
+    straight = HAS_STRAIGHT[bits] & ~HAS_STRAIGHT[board_bits][:, None]
+    quads = ((rank_counts == 4) & hero_ranks).any(axis=2)
+    trips_any = (rank_counts >= 3).any(axis=2)
+    pairs_count = (rank_counts >= 2).sum(axis=2)
+    full_house = trips_any & (pairs_count >= 2) & ((rank_counts >= 2) & hero_ranks).any(axis=2)
+    set_ = ((rank_counts == 3) & (hole_rank_counts[None] == 2)).any(axis=2)
+    trips = ((rank_counts == 3) & (hole_rank_counts[None] == 1)).any(axis=2)
+    hero_pairs = (rank_counts == 2) & hero_ranks
+    two_pair = ((rank_counts == 2) & (hole_rank_counts[None] == 1)).sum(axis=2) >= 2
+    pair_rank = np.where(hero_pairs.any(axis=2), 12 - hero_pairs[:, :, ::-1].argmax(axis=2), -1)
+    is_pair = pair_rank >= 0
+    pocket = IS_POCKET_PAIR[combos][None, :]
+
+    conditions = [
+        flush & HAS_STRAIGHT[suit_bits],
+        quads,
+        full_house,
+        flush,
+        straight,
+        set_,
+        trips,
+        two_pair,
+        is_pair & pocket & (pair_rank > top_board[:, None]),
+        is_pair & ~pocket & (pair_rank == top_board[:, None]),
+        is_pair & (pair_rank >= second_board[:, None]) & (pair_rank < top_board[:, None]),
+        is_pair,
+    ]
+    made = np.select(conditions, list(range(len(conditions))), default=HIGH_CARD).astype(np.int8)
+    made[~valid] = -1
+
+    draws = np.zeros(made.shape, dtype=np.uint8)
+    if board_size < 5:
+        drawing = ~np.isin(made, (STRAIGHT_FLUSH, QUADS, FULL_HOUSE, FLUSH, STRAIGHT))
+        draws |= np.where(drawing & (best_suit_count == 4) & hero_in_suit, FLUSH_DRAW, 0).astype(np.uint8)
+        if board_size == 3:
+            draws |= np.where(drawing & (best_suit_count == 3) & hero_in_suit, BACKDOOR_FLUSH, 0).astype(np.uint8)
+        # Rangs qui complètent une quinte grâce aux cartes du joueur (pas déjà au board seul)
+        outs = COMPLETING_RANKS[bits] & ~COMPLETING_RANKS[board_bits][:, None]
+        out_count = BIT_COUNTS[outs]
+        draws |= np.where(drawing & (out_count >= 2), OPEN_ENDED, 0).astype(np.uint8)
+        draws |= np.where(drawing & (out_count == 1), GUTSHOT, 0).astype(np.uint8)
+        overcards = (made == HIGH_CARD) & (HOLE_LOW[combos][None, :] > top_board[:, None])
+        draws |= np.where(overcards, OVERCARDS, 0).astype(np.uint8)
+    draws[~valid] = 0
+
+    if single:
+        return made[0], draws[0], valid[0]
+    return made, draws, valid
+
+
+def range_texture(hand_range, board, dead=()):
+    """
+    Répartition d'un range sur un board : combinaisons pondérées par main faite et par tirage.
+
+    Returns:
+        dict: {"total": combos restants, "mains": {catégorie: combos}, "tirages": {tirage: combos}}.
+    """
+    weights = narrow_range(hand_range, board, dead).weights
+    made, draws, _ = classify(board)
+    made_combos = np.bincount(made[made >= 0], weights=weights[made >= 0], minlength=len(MADE_HAND_NAMES))
+    return {
+        "total": float(weights.sum()),
+        "mains": {name: float(made_combos[i]) for i, name in enumerate(MADE_HAND_NAMES)},
+        "tirages": {name: float(weights[(draws & 1 << i) != 0].sum()) for i, name in enumerate(DRAW_NAMES)},
+    }
+
+
+def all_flops():
+    """Les 22 100 flops possibles, tableau (22100, 3) d'index de cartes."""
+    return np.array(list(itertools.combinations(range(52), 3)), dtype=np.int8)
+
+
+def sweep_flops(hand_range, flops=None, chunk_size=500):
+    """
+    Mesure comment un range préflop touche chaque flop, par lots vectorisés.
+
+    Returns:
+        tuple: (flops (F, 3), combos par main faite (F, 13), combos par tirage (F, 5), combos restants (F,)).
+    """
+    flops = all_flops() if flops is None else np.asarray(flops)
+    weights = Range.from_hands(hand_range).weights
+    made_combos = np.zeros((len(flops), len(MADE_HAND_NAMES)), dtype=np.float32)
+    draw_combos = np.zeros((len(flops), len(DRAW_NAMES)), dtype=np.float32)
+    totals = np.zeros(len(flops), dtype=np.float32)
+
+    active = np.flatnonzero(weights)
+    for start in range(0, len(flops), chunk_size):
+        made, draws, valid = classify(flops[start:start + chunk_size], active)
+        chunk_weights = np.broadcast_to(weights[active], made.shape)
+        rows = np.broadcast_to(np.arange(len(made))[:, None], made.shape)
+
+        index = rows[valid] * len(MADE_HAND_NAMES) + made[valid]
+        made_combos[start:start + len(made)] = np.bincount(
+            index, weights=chunk_weights[valid], minlength=len(made) * len(MADE_HAND_NAMES)
+        ).reshape(len(made), -1)
+        for i in range(len(DRAW_NAMES)):
+            draw_combos[start:start + len(made), i] = (((draws & 1 << i) != 0) * chunk_weights).sum(axis=1)
+        totals[start:start + len(made)] = (valid * chunk_weights).sum(axis=1)
+    return flops, made_combos, draw_combos, totals
+
+
+if __name__ == "__main__":
+    from range_calculator import get_hands_for_percentage
+
+    start = time.perf_counter()
+    flops, made_combos, draw_combos, totals = sweep_flops(get_hands_for_percentage(20))
+    elapsed = time.perf_counter() - start
+    print(f"{len(flops):,} flops analysés en {elapsed:.2f} s")
+    for i, name in enumerate(MADE_HAND_NAMES):
+        print(f"  {name:<15} {made_combos[:, i].sum() / totals.sum():6.2%}")
@@ -0,0 +1,492 @@
+# cfr_solver.py
+
+import time
+
+import numpy as np
+
+from hand_evaluator import MAX_HAND_VALUE, cards_mask, evaluate_batch, parse_cards
+from isomorphism import CARD_PERMUTATIONS, restore_combos
+from range_calculator import Range, COMBO_CARDS, COMBO_CARD_MASKS, TOTAL_COMBINATIONS
+
+OOP, IP = 0, 1
+DEFAULT_BET_SIZES = (0.33, 0.75)
+DEFAULT_RAISE_SIZES = (1.0,)
+DEFAULT_ITERATIONS = 500
+
+
+class Node:
+    """
+    Nœud de l'arbre de jeu. Les regrets et la somme des stratégies sont des tableaux
+    (actions, mains du joueur) : une ligne par action, une colonne par combinaison.
+    """
+
+    __slots__ = ("kind", "player", "actions", "children", "commits", "batched", "regrets", "strategy_sum")
+
+    def __init__(self, kind, commits, player=None, batched=False):
+        self.kind = kind  # "action", "fold", "showdown" ou "chance"
+        self.commits = commits  # Mises engagées par chaque joueur depuis le début du sous-jeu
+        self.player = player  # Joueur qui agit (action) ou qui se couche (fold)
+        # Nœud de river après un turn : un seul sous-arbre pour toutes les rivers, les tableaux
+        # ont alors un axe supplémentaire (rivers, mains)
+        self.batched = batched
+        self.actions = []
+        self.children = []
+        self.regrets = None
+        self.strategy_sum = None
+
+
+def _regret_matching(regrets):
+    """Stratégie courante : regrets positifs normalisés, uniforme si aucun regret positif."""
+    positive = np.maximum(regrets, 0.0)
+    totals = positive.sum(axis=0)
+    return np.where(totals > 0, positive / np.where(totals > 0, totals, 1.0), 1.0 / len(regrets))
+
+
+def _sorted_search(keys, queries):
+    """Ordre de tri de `keys` et positions (gauche, droite) de `queries` dans les clés triées."""
+    order = np.argsort(keys, axis=None, kind="stable")
+    sorted_keys = keys.ravel()[order]
+    return order, np.searchsorted(sorted_keys, queries, side="left"), np.searchsorted(sorted_keys, queries, side="right")
+
+
+class _Showdown:
+    """
+    Abattages de toutes les mains d'un joueur contre un range adverse pondéré, sans matrice
+    (mains x mains) : les mains adverses sont triées par valeur une fois pour toutes, et
+    (poids des mains battues - poids des mains gagnantes) s'obtient par sommes cumulées.
+    Les mains adverses qui partagent une carte avec la nôtre sont retirées de la même façon,
+    avec un tri par (carte, valeur) : une combinaison identique fait égalité et ne compte pas.
+    Tous les boards finaux (rivers) sont traités en un seul passage.
+
+    Args:
+        values (list): Valeurs (rivers, mains) de chaque joueur.
+        combos (list): Index des combinaisons de chaque joueur.
+    """
+
+    def __init__(self, values, combos):
+        rows = len(values[0])
+        stride = MAX_HAND_VALUE + 1
+        river_index = np.arange(rows)[:, None]
+        self.sides = []
+        for player in (OOP, IP):
+            mine, theirs = values[player], values[1 - player]
+            mine_cards = COMBO_CARDS[combos[player]].astype(np.int64)
+            theirs_cards = COMBO_CARDS[combos[1 - player]].astype(np.int64)
+
+            # Une seule recherche pour toutes les rivers : clé = river * stride + valeur
+            order, below, above = _sorted_search(theirs + river_index * stride, mine + river_index * stride)
+            starts = river_index * theirs.shape[1]
+
+            # Mains adverses contenant chaque carte : clé = (river * 52 + carte) * stride + valeur
+            card_keys = ((river_index[..., None] * 52 + theirs_cards[None]) * stride + theirs[..., None])
+            groups = (river_index[..., None] * 52 + mine_cards[None]) * stride
+            card_order, card_below, card_above = _sorted_search(card_keys, groups + mine[..., None])
+            sorted_card_keys = card_keys.ravel()[card_order]
+            reach_index = np.broadcast_to(
+                (river_index * theirs.shape[1] + np.arange(theirs.shape[1]))[..., None], card_keys.shape
+            ).ravel()[card_order]
+
+            self.sides.append({
+                "order": order, "starts": starts, "ends": starts + theirs.shape[1],
+                "below": below, "above": above,
+                "reach_index": reach_index, "card_below": card_below, "card_above": card_above,
+                "card_starts": np.searchsorted(sorted_card_keys, groups, side="left"),
+                "card_ends": np.searchsorted(sorted_card_keys, groups + stride, side="left"),
+            })
+
+    def utility(self, player, opponent_reach):
+        """
+        Somme, pour chaque main de `player`, des poids adverses battus moins des poids gagnants.
+
+        Args:
+            opponent_reach (np.ndarray): Poids (rivers, mains adverses).
+
+        Returns:
+            np.ndarray: Tableau (rivers, mains de `player`).
+        """
+        side = self.sides[player]
+        flat_reach = opponent_reach.ravel()
+        cumulative = np.concatenate([[0.0], np.cumsum(flat_reach[side["order"]], dtype=np.float64)])
+        total = (cumulative[side["below"]] - cumulative[side["starts"]]) \
+            - (cumulative[side["ends"]] - cumulative[side["above"]])
+
+        card_cumulative = np.concatenate([[0.0], np.cumsum(flat_reach[side["reach_index"]], dtype=np.float64)])
+        blocked = (card_cumulative[side["card_below"]] - card_cumulative[side["card_starts"]]) \
+            - (card_cumulative[side["card_ends"]] - card_cumulative[side["card_above"]])
+        return (total - blocked.sum(axis=-1)).astype(np.float32)
+
+
+class SubgameSolver:
+    """
+    Solveur CFR+ d'un sous-jeu turn ou river à deux joueurs (OOP parle en premier).
+
+    Toutes les mises à jour (regrets, stratégies, utilités) sont des opérations NumPy sur
+    l'ensemble des combinaisons d'un joueur : un parcours de l'arbre traite toutes les mains
+    à la fois. Les abattages sont calculés par sommes cumulées sur les mains triées par valeur
+    (voir `_Showdown`). Au turn, les 48 rivers partagent le même sous-arbre, parcouru une seule
+    fois avec des tableaux (rivers, mains).
+
+    Args:
+        oop_range, ip_range (Range | list): Ranges des deux joueurs.
+        board (str | list): Board de 4 (turn) ou 5 (river) cartes.
+        pot (float): Pot au début du sous-jeu.
+        stack (float): Tapis effectif restant.
+        bet_sizes (tuple): Tailles de mise en fraction du pot.
+        raise_sizes (tuple): Tailles de relance en fraction du pot (après avoir suivi).
+        max_raises (int): Nombre maximal de mises et relances par street.
+    """
+
+    def __init__(self, oop_range, ip_range, board, pot, stack, bet_sizes=DEFAULT_BET_SIZES,
+                 raise_sizes=DEFAULT_RAISE_SIZES, max_raises=3, allin=True):
+        self.board = parse_cards(board)
+        if len(self.board) not in (4, 5):
+            raise ValueError(f"Board de 4 ou 5 cartes attendu ({len(self.board)} reçues).")
+        self.pot = float(pot)
+        self.stack = float(stack)
+        self.bet_sizes = tuple(bet_sizes)
+        self.raise_sizes = tuple(raise_sizes)
+        self.max_raises = max_raises
+        self.allin = allin
+
+        board_mask = cards_mask(self.board)
+        self.combos = []
+        self.initial_reach = []
+        for hand_range in (oop_range, ip_range):
+            weights = Range.from_hands(hand_range).weights
+            combos = np.flatnonzero((weights > 0) & ((COMBO_CARD_MASKS & board_mask) == 0))
+            self.combos.append(combos)
+            self.initial_reach.append(weights[combos].astype(np.float32))
+        if not all(len(combos) for combos in self.combos):
+            raise ValueError("Un des ranges est vide une fois les cartes du board retirées.")
+
+        masks = [COMBO_CARD_MASKS[combos] for combos in self.combos]
+        self.compatible = ((masks[0][:, None] & masks[1][None, :]) == 0).astype(np.float32)
+        if len(self.board) == 5:
+            self.rivers = []
+            boards = [self.board]
+            blocked = [np.zeros((1, len(combos)), dtype=bool) for combos in self.combos]
+        else:
+            self.rivers = [card for card in range(52) if not board_mask >> card & 1]
+            boards = [self.board + [card] for card in self.rivers]
+            # Mains bloquées par chaque river : tableaux (rivers, mains)
+            blocked = [np.stack([(mask >> card & 1).astype(bool) for card in self.rivers]) for mask in masks]
+            # Une paire de mains compatibles laisse 44 rivers possibles
+            self.chance_weight = np.float32(1.0 / (len(self.rivers) - 4))
+        self.river_blocked = blocked
+        self.showdown = _Showdown(
+            [self._hand_values(combos, boards, player_blocked) for combos, player_blocked in zip(self.combos, blocked)],
+            self.combos,
+        )
+
+        self.root = self._build_street(np.zeros(2), street=len(self.board), batched=False)
+        self.iterations = 0
+        self.history = []
+        # Permutation de couleurs qui mène du spot demandé à ce spot (résolu sous forme canonique)
+        self.permutation = 0
+
+    @staticmethod
+    def _hand_values(combos, boards, blocked):
+        """Valeurs (rivers, mains) des combinaisons sur chaque board final, 0 pour les mains bloquées."""
+        values = np.zeros(blocked.shape, dtype=np.int32)
+        hands = np.empty(blocked.shape + (7,), dtype=np.int8)
+        hands[..., :2] = COMBO_CARDS[combos][None]
+        hands[..., 2:] = np.array(boards, dtype=np.int8)[:, None, :]
+        values[~blocked] = evaluate_batch(hands[~blocked])
+        return values
+
+    def _bet_amounts(self, commits, player, sizes):
+        """Montants totaux engagés après une mise ou relance de chacune des tailles, plus le tapis."""
+        pot = self.pot + commits.sum()
+        call = commits[1 - player] - commits[player]
+        amounts = []
+        for size in sizes:
+            target = commits[1 - player] + size * (pot + call)
+            if target >= self.stack * 0.95:  # Mise proche du tapis : on pousse directement
+                target = self.stack
+            if target not in amounts:
+                amounts.append(target)
+        if self.allin and self.stack not in amounts:
+            amounts.append(self.stack)
+        return amounts
+
+    def _build_street(self, commits, street, batched, player=OOP, raises=0):
+        """Construit récursivement les actions d'une street (street = 4 pour le turn, 5 pour la river)."""
+        node = Node("action", commits.copy(), player=player, batched=batched)
+        opponent = 1 - player
+        facing = commits[opponent] > commits[player]
+
+        if facing:
+            node.actions.append("Fold")
+            node.children.append(Node("fold", commits.copy(), player=player, batched=batched))
+            called = commits.copy()
+            called[player] = called[opponent]
+            node.actions.append("Call")
+            node.children.append(self._end_street(called, street, batched))
+            sizes, label = self.raise_sizes, "Raise"
+        else:
+            node.actions.append("Check")
+            if player == OOP:
+                node.children.append(self._build_street(commits, street, batched, IP, raises))
+            else:
+                node.children.append(self._end_street(commits, street, batched))
+            sizes, label = self.bet_sizes, "Bet"
+
+        if raises < self.max_raises and commits[opponent] < self.stack:
+            for amount in self._bet_amounts(commits, player, sizes):
+                bet = commits.copy()
+                bet[player] = amount
+                name = "All-in" if amount == self.stack else f"{label} {amount - commits[opponent]:g}"
+                node.actions.append(name)
+                node.children.append(self._build_street(bet, street, batched, opponent, raises + 1))
+
+        shape = (len(node.actions),) + ((len(self.rivers),) if batched else ()) + (len(self.combos[player]),)
+        node.regrets = np.zeros(shape, dtype=np.float32)
+        node.strategy_sum = np.zeros_like(node.regrets)
+        return node
+
+    def _end_street(self, commits, street, batched):
+        """Fin d'une street : abattage à la river, sinon nœud de hasard (carte de river)."""
+        if street == 5:
+            return Node("showdown", commits.copy(), batched=batched)
+        chance = Node("chance", commits.copy())
+        if commits[0] >= self.stack:  # Tapis : plus d'action à la river
+            chance.children.append(Node("showdown", commits.copy(), batched=True))
+        else:
+            chance.children.append(self._build_street(commits, 5, batched=True))
+        return chance
+
+    def _terminal_utility(self, node, traverser, opponent_reach):
+        """Utilité de chaque main du joueur `traverser` à un nœud terminal, pondérée par le range adverse."""
+        if node.kind == "fold":
+            # Celui qui se couche perd sa moitié du pot initial plus ce qu'il a engagé
+            amount = self.pot / 2 + node.commits[node.player]
+            sign = -1.0 if node.player == traverser else 1.0
+            if traverser == OOP:
+                return sign * amount * (opponent_reach @ self.compatible.T)
+            return sign * amount * (opponent_reach @ self.compatible)
+
+        amount = self.pot / 2 + node.commits[0]
+        if node.batched:
+            return amount * self.showdown.utility(traverser, opponent_reach)
+        return amount * self.showdown.utility(traverser, opponent_reach[None])[0]
+
+    def _deal_river(self, reach):
+        """Portées (rivers, mains) après la river : les mains qui contiennent la carte sont retirées."""
+        return [reach[player] * ~self.river_blocked[player] for player in (OOP, IP)]
+
+    def _collect_rivers(self, utilities, player):
+        """Moyenne sur les rivers des utilités (rivers, mains) d'un joueur."""
+        return np.where(self.river_blocked[player], 0.0, utilities).sum(axis=0) * self.chance_weight
+
+    def _cfr(self, node, traverser, reach, weight):
+        """Un parcours CFR+ : met à jour les regrets du joueur `traverser` et retourne ses utilités."""
+        if node.kind in ("fold", "showdown"):
+            return self._terminal_utility(node, traverser, reach[1 - traverser])
+
+        if node.kind == "chance":
+            child_utility = self._cfr(node.children[0], traverser, self._deal_river(reach), weight)
+            return self._collect_rivers(child_utility, traverser)
+
+        strategy = _regret_matching(node.regrets)
+        if node.player == traverser:
+            utilities = np.stack([self._cfr(child, traverser, reach, weight) for child in node.children])
+            node_utility = (strategy * utilities).sum(axis=0)
+            # CFR+ : regrets cumulés planchers à 0, moyenne des stratégies pondérée par l'itération
+            node.regrets = np.maximum(node.regrets + utilities - node_utility, 0.0)
+            node.strategy_sum += weight * strategy * reach[traverser]
+            return node_utility
+
+        utility = np.zeros_like(reach[traverser])
+        for action, child in enumerate(node.children):
+            child_reach = list(reach)
+            child_reach[node.player] = reach[node.player] * strategy[action]
+            utility += self._cfr(child, traverser, child_reach, weight)
+        return utility
+
+    def _best_response(self, node, player, reach):
+        """Utilités d'une meilleure réponse de `player` contre la stratégie moyenne de l'adversaire."""
+        if node.kind in ("fold", "showdown"):
+            return self._terminal_utility(node, player, reach[1 - player])
+
+        if node.kind == "chance":
+            child_utility = self._best_response(node.children[0], player, self._deal_river(reach))
+            return self._collect_rivers(child_utility, player)
+
+        if node.player == player:
+            return np.max([self._best_response(child, player, reach) for child in node.children], axis=0)
+
+        strategy = self.average_strategy(node)
+        utility = np.zeros_like(reach[player])
+        for action, child in enumerate(node.children):
+            child_reach = list(reach)
+            child_reach[node.player] = reach[node.player] * strategy[action]
+            utility += self._best_response(child, player, child_reach)
+        return utility
+
+    @staticmethod
+    def average_strategy(node):
+        """Stratégie moyenne (actions, mains) d'un nœud, uniforme pour les mains jamais atteintes."""
+        totals = node.strategy_sum.sum(axis=0)
+        return np.where(
+            totals > 0, node.strategy_sum / np.where(totals > 0, totals, 1.0), 1.0 / len(node.actions)
+        )
+
+    def exploitability(self):
+        """
+        Exploitabilité de la stratégie moyenne : moyenne des gains des deux meilleures réponses,
+        en jetons par main (0 à l'équilibre).
+        """
+        reach = self.initial_reach
+        total_pairs = float(reach[0] @ self.compatible @ reach[1])
+        values = [
+            float(reach[player] @ self._best_response(self.root, player, reach)) / total_pairs
+            for player in (OOP, IP)
+        ]
+        return sum(values) / 2
+
+    def solve(self, iterations=DEFAULT_ITERATIONS, target=0.005, report_every=10, verbose=True):
+        """
+        Itère CFR+ (mises à jour alternées des deux joueurs) jusqu'à `iterations` ou jusqu'à une
+        exploitabilité inférieure à `target` (fraction du pot).
+
+        Returns:
+            list: Historique [(itération, exploitabilité en jetons)].
+        """
+        start = time.perf_counter()
+        for _ in range(iterations):
+            self.iterations += 1
+            for traverser in (OOP, IP):
+                self._cfr(self.root, traverser, list(self.initial_reach), self.iterations)
+
+            if self.iterations % report_every == 0 or self.iterations == 1:
+                exploitability = self.exploitability()
+                self.history.append((self.iterations, exploitability))
+                if verbose:
+                    print(f"Itération {self.iterations:>5} : exploitabilité {exploitability:.4f} "
+                          f"({exploitability / self.pot:.2%} du pot), {time.perf_counter() - start:.1f} s")
+                if exploitability <= target * self.pot:
+                    break
+        return self.history
+
+    def node_at(self, path=()):
+        """
+        Nœud atteint par une suite d'actions depuis la racine (ex: ("Check", "Bet 6.6")).
+        Au turn, la carte de river fait partie du chemin (ex: ("Check", "Check", "Qs", "Bet 6.6")).
+
+        Returns:
+            tuple: (nœud, index de la river dans `rivers` ou None).
+        """
+        node, river = self.root, None
+        for action in path:
+            if node.kind == "chance":
+                river = self.rivers.index(int(CARD_PERMUTATIONS[self.permutation][parse_cards([action])[0]]))
+                node = node.children[0]
+            else:
+                node = node.children[node.actions.index(action)]
+        return node, river
+
+    def strategy(self, path=()):
+        """
+        Stratégie moyenne au nœud `path`, par action, en fréquences sur les 1326 combinaisons.
+
+        Returns:
+            dict: {action: Range pondéré des combinaisons qui la jouent}.
+        """
+        node, river = self.node_at(path)
+        if node.kind != "action":
+            raise ValueError(f"Le nœud {path} n'est pas un nœud d'action ({node.kind}).")
+        if node.batched and river is None:
+            raise ValueError(f"Le chemin {path} doit préciser la carte de river.")
+        strategy = self.average_strategy(node)
+        reach = self.initial_reach[node.player]
+        if node.batched:
+            strategy = strategy[:, river]
+            reach = reach * ~self.river_blocked[node.player][river]
+        combos = self.combos[node.player]
+        result = {}
+        for action, frequencies in zip(node.actions, strategy):
+            weights = np.zeros(TOTAL_COMBINATIONS, dtype=np.float32)
+            weights[combos] = frequencies * reach
+            result[action] = Range.from_weights(restore_combos(weights, self.permutation))
+        return result
+
+    def action_nodes(self):
+        """Nœuds d'action dans un ordre fixe (parcours en profondeur), pour sauvegarder l'état."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.kind == "action":
+                yield node
+            stack.extend(reversed(node.children))
+
+    def export_state(self):
+        """État du solveur (regrets, stratégies cumulées, historique) en dictionnaire de tableaux."""
+        state = {"iterations": np.array(self.iterations), "history": np.array(self.history).reshape(-1, 2)}
+        for index, node in enumerate(self.action_nodes()):
+            state[f"regrets_{index}"] = node.regrets
+            state[f"strategy_{index}"] = node.strategy_sum
+        return state
+
+    def load_state(self, state):
+        """Reprend un état exporté par `export_state` (même arbre), pour l'afficher ou continuer."""
+        for index, node in enumerate(self.action_nodes()):
+            node.regrets = np.array(state[f"regrets_{index}"])
+            node.strategy_sum = np.array(state[f"strategy_{index}"])
+        self.iterations = int(state["iterations"])
+        self.history = [(int(iteration), float(value)) for iteration, value in state["history"]]
+
+
+def cached_solve(oop_range, ip_range, board, pot, stack, bet_sizes=DEFAULT_BET_SIZES,
+                 raise_sizes=DEFAULT_RAISE_SIZES, max_raises=3, allin=True, store=None, **solve_options):
+    """
+    Résout un sous-jeu en passant par le cache des solutions : le spot est ramené à sa forme
+    canonique (couleurs), une solution déjà calculée est rechargée, et n'est reprise que si
+    son exploitabilité dépasse la cible.
+
+    Returns:
+        SubgameSolver: Le solveur résolu ; `strategy` rend les ranges dans les couleurs d'origine.
+    """
+    from solution_store import default_store, spot_key
+
+    store = store or default_store()
+    tree = {"pot": pot, "stack": stack, "bet_sizes": tuple(bet_sizes), "raise_sizes": tuple(raise_sizes),
+            "max_raises": max_raises, "allin": allin}
+    key, canonical, (oop_canonical, ip_canonical), permutation = spot_key(
+        "cfr", board, [oop_range, ip_range], **tree
+    )
+    solver = SubgameSolver(oop_canonical, ip_canonical, canonical, pot, stack, bet_sizes, raise_sizes,
+                           max_raises, allin)
+    solver.permutation = permutation
+
+    state = store.get(key)
+    if state is not None:
+        solver.load_state(state)
+    target = solve_options.get("target", 0.005)
+    if state is None or not solver.history or solver.history[-1][1] > target * solver.pot:
+        solver.solve(**solve_options)
+        store.put(key, "cfr", solver.export_state())
+    return solver
+
+
+def solve_stored(oop_position, oop_type, ip_position, ip_type, board, pot, stack, **kwargs):
+    """
+    Résout un sous-jeu à partir de deux ranges enregistrés (ex: BB "Call 3-Bet" contre BTN "3-Bet"),
+    via le cache des solutions (voir `cached_solve`).
+
+    Returns:
+        SubgameSolver: Le solveur après résolution (voir `strategy`).
+    """
+    from database_range import load_range
+
+    return cached_solve(load_range(oop_position, oop_type), load_range(ip_position, ip_type),
+                        board, pot, stack, **kwargs)
+
+
+if __name__ == "__main__":
+    from range_calculator import get_hands_for_percentage
+
+    solver = SubgameSolver(get_hands_for_percentage(30), get_hands_for_percentage(20),
+                           "KhTd7c4s2h", pot=10, stack=40)
+    solver.solve(iterations=300)
+    for action, hand_range in solver.strategy().items():
+        print(f"{action:>10} : {hand_range.combinations:.1f} combos")
@@ -1,30 +1,106 @@
 import sqlite3
+import threading
 import config  # Importer la variable globale pour le chemin de la base de données
+from db_connection import BUSY_TIMEOUT_MS, execute, fetchall, fetchone, transaction
+from range_calculator import CLASS_INDEX, Range
+
+
+SCHEMA_VERSION = 1  # PRAGMA user_version : 0 = mains en texte, 1 = masques binaires
+
+UPSERT_RANGE = """
+    INSERT INTO ranges (position, range_type, mask, weights)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(position, range_type) DO UPDATE SET
+    mask = excluded.mask,
+    weights = excluded.weights,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _row_to_range(mask, weights):
+    """Convertit une ligne (mask, weights) en `Range` : fréquences si présentes, sinon masque 169 bits."""
+    if weights is not None:
+        return Range.from_bytes(weights)
+    return Range.from_mask_bytes(mask)
+
+
+def range_columns(hand_range):
+    """Colonnes (mask, weights) d'un range : les poids ne sont stockés que pour un range à fréquences mixtes."""
+    return hand_range.to_mask_bytes(), hand_range.to_bytes() if hand_range.is_weighted else None
+
+
+def _text_row_to_range(position, range_type, hands, weights):
+    """
+    Range d'une ligne de l'ancien schéma (texte "AA,KK,AKs", éventuellement avec fréquences).
+    Des fréquences illisibles sont signalées et ignorées : le range est repris du texte.
+    """
+    if weights is not None:
+        try:
+            return Range.from_bytes(weights)
+        except (ValueError, TypeError) as e:
+            print(f"Fréquences illisibles pour {position} ({range_type}), mains en texte conservées : {e}")
+    hands = (hands or "").split(",")
+    known = [hand for hand in hands if hand in CLASS_INDEX]
+    ignored = [hand for hand in hands if hand and hand not in CLASS_INDEX]
+    if ignored:
+        print(f"Mains inconnues ignorées pour {position} ({range_type}) : {', '.join(ignored)}")
+    return Range(known)
+
+
+def _create_ranges_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ranges (
+            position TEXT NOT NULL,
+            range_type TEXT NOT NULL,
+            mask BLOB NOT NULL,
+            weights BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (position, range_type)
+        )
+    """)
+
+
+def _migrate_text_ranges(conn, columns):
+    """
+    Convertit la table `ranges` de l'ancien schéma (colonne `hands` en texte) vers les
+    masques binaires. Exécuté une seule fois, dans la transaction de `create_table`.
+    """
+    weights = "weights" if "weights" in columns else "NULL"
+    rows = conn.execute(
+        f"SELECT position, range_type, hands, {weights}, created_at, updated_at FROM ranges"
+    ).fetchall()
+    conn.execute("DROP TABLE ranges")
+    _create_ranges_table(conn)
+    conn.executemany("""
+        INSERT INTO ranges (position, range_type, mask, weights, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (position, range_type, *range_columns(_text_row_to_range(position, range_type, hands, blob)),
+         created_at, updated_at)
+        for position, range_type, hands, blob, created_at, updated_at in rows
+    ])
+    print(f"{len(rows)} ranges convertis au format binaire.")
 
 
 def create_table():
     """
-    Crée la table `ranges` si elle n'existe pas déjà.
+    Crée la table `ranges` si elle n'existe pas déjà, et migre au besoin les anciennes
+    bases (mains en texte) vers le schéma courant.
     """
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ranges (
-                position TEXT NOT NULL,
-                range_type TEXT NOT NULL,
-                hands TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (position, range_type)
-            )
-        """)
-        conn.commit()
+        with transaction(config.DB_PATH) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(ranges)")]
+                if "hands" in columns:
+                    _migrate_text_ranges(conn, columns)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            _create_ranges_table(conn)
+
         print("Table `ranges` vérifiée ou créée avec succès.")
     except sqlite3.Error as e:
         print(f"Erreur lors de la création de la table : {e}")
-    finally:
-        conn.close()
 
 
 def save_range(position, range_type, hands):
@@ -34,36 +110,14 @@ def save_range(position, range_type, hands):
     Args:
         position (str): La position (ex: UTG, CO, BTN).
         range_type (str): Le type de range (ex: Open, 3-Bet).
-        hands (list): Liste des mains sélectionnées.
+        hands (Range | list): Range (éventuellement à fréquences mixtes) ou liste des mains.
     """
+    mask, weights = range_columns(Range.from_hands(hands))
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT hands FROM ranges WHERE position = ? AND range_type = ?
-        """, (position, range_type))
-        result = cursor.fetchone()
-
-        if result:
-            cursor.execute("""
-                UPDATE ranges
-                SET hands = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE position = ? AND range_type = ?
-            """, (",".join(hands), position, range_type))
-            print(f"Range mis à jour pour {position} ({range_type}).")
-        else:
-            cursor.execute("""
-                INSERT INTO ranges (position, range_type, hands)
-                VALUES (?, ?, ?)
-            """, (position, range_type, ",".join(hands)))
-            print(f"Range ajouté pour {position} ({range_type}).")
-
-        conn.commit()
+        execute(config.DB_PATH, UPSERT_RANGE, (position, range_type, mask, weights))
+        print(f"Range enregistré pour {position} ({range_type}).")
     except sqlite3.Error as e:
         print(f"Erreur lors de la sauvegarde dans la base de données : {e}")
-    finally:
-        conn.close()
 
 
 def load_range(position, range_type):
@@ -75,23 +129,17 @@ def load_range(position, range_type):
         range_type (str): Le type de range (ex: Open, 3-Bet).
 
     Returns:
-        list: Liste des mains pour ce range.
+        Range: Le range chargé (vide si aucun range n'est enregistré).
     """
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT hands FROM ranges WHERE position = ? AND range_type = ?
+        result = fetchone(config.DB_PATH, """
+            SELECT mask, weights FROM ranges WHERE position = ? AND range_type = ?
         """, (position, range_type))
-        result = cursor.fetchone()
-
-        conn.close()
         if result:
-            return result[0].split(",")  # Retourne une liste des mains
+            return _row_to_range(*result)
     except sqlite3.Error as e:
         print(f"Erreur lors du chargement des ranges : {e}")
-    return []
+    return Range()
 
 
 def load_all_ranges():
@@ -99,19 +147,135 @@ def load_all_ranges():
     Charge tous les ranges de la base de données.
 
     Returns:
-        list: Liste de tuples (position, range_type, hands).
+        list: Liste de tuples (position, range_type, Range).
     """
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT position, range_type, hands FROM ranges
+        results = fetchall(config.DB_PATH, """
+            SELECT position, range_type, mask, weights FROM ranges
         """)
-        results = cursor.fetchall()
-
-        conn.close()
-        return results
+        return [
+            (position, range_type, _row_to_range(mask, weights))
+            for position, range_type, mask, weights in results
+        ]
     except sqlite3.Error as e:
         print(f"Erreur lors du chargement de tous les ranges : {e}")
         return []
+
+
+def load_range_types():
+    """
+    Liste les types de range enregistrés (ex: types générés "Push 10bb").
+
+    Returns:
+        list: Types distincts, triés.
+    """
+    try:
+        results = execute(config.DB_PATH, "SELECT DISTINCT range_type FROM ranges ORDER BY range_type")
+        return [range_type for (range_type,) in results]
+    except sqlite3.Error as e:
+        print(f"Erreur lors du chargement des types de range : {e}")
+        return []
+
+
+class RangeCache:
+    """
+    Copie en mémoire de tous les ranges, chargée en une requête puis servie sans accès disque.
+
+    Les sauvegardes sont écrites dans SQLite et dans le cache (write-through), par la
+    connexion propre au cache. Les modifications faites par une autre connexion (autre
+    processus, import, etc.) sont détectées avec `PRAGMA data_version` lu sur cette même
+    connexion, qui ne change pas pour ses propres écritures : le cache n'est rechargé que
+    dans ce cas, y compris quand `write` est appelé depuis un thread d'écriture.
+
+    Écritures en arrière-plan (`remember` dans le thread de l'interface, puis `write` dans
+    le thread d'écriture) : le range est gardé comme « en attente » jusqu'à la fin de son
+    écriture, et réappliqué après tout rechargement (jamais d'ancienne valeur affichée).
+    """
+
+    def __init__(self):
+        self.ranges = {}
+        self.data_version = None
+        self.pending = {}  # Ranges pas encore écrits en base : {(position, type): Range}
+        self.lock = threading.Lock()  # Protège `pending`, partagé avec le thread d'écriture
+        # Connexion du cache, partagée entre l'interface et le thread d'écriture (un seul à la fois)
+        self.connection = sqlite3.connect(
+            config.DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection_lock = threading.Lock()
+        self.refresh()
+
+    def _current_version(self):
+        # Écriture en cours dans l'autre thread : pas d'attente, la vérification est faite au prochain appel
+        if not self.connection_lock.acquire(blocking=False):
+            return self.data_version
+        try:
+            return self.connection.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la vérification de la base : {e}")
+            return self.data_version
+        finally:
+            self.connection_lock.release()
+
+    def refresh(self, force=False):
+        """Recharge les ranges si la base a été modifiée ailleurs (ou si `force`). Retourne True si rechargé."""
+        version = self._current_version()
+        if not force and self.data_version is not None and version == self.data_version:
+            return False
+        # La version est lue avant le chargement : une écriture concurrente sera vue au prochain appel
+        self.data_version = version
+        ranges = {(position, range_type): hand_range for position, range_type, hand_range in load_all_ranges()}
+        with self.lock:
+            ranges.update(self.pending)  # Les sauvegardes pas encore écrites restent visibles
+        self.ranges = ranges
+        return True
+
+    def get(self, position, range_type):
+        """Range enregistré (copie modifiable), vide s'il n'existe pas."""
+        self.refresh()
+        hand_range = self.ranges.get((position, range_type))
+        return hand_range.copy() if hand_range is not None else Range()
+
+    def remember(self, position, range_type, hand_range):
+        """
+        Met à jour le cache seul et marque le range en attente d'écriture (l'écriture est
+        faite par l'appelant avec `write`, ex: en arrière-plan). Retourne le range mémorisé.
+        """
+        hand_range = Range.from_hands(hand_range)
+        with self.lock:
+            self.pending[(position, range_type)] = hand_range
+        self.ranges[(position, range_type)] = hand_range
+        return hand_range
+
+    def write(self, position, range_type, hand_range):
+        """
+        Écrit un range mémorisé par `remember` (depuis n'importe quel thread) et le retire des
+        ranges en attente. Lève `sqlite3.Error` en cas d'échec.
+        """
+        key = (position, range_type)
+        try:
+            with self.connection_lock:
+                self.connection.execute(UPSERT_RANGE, (position, range_type, *range_columns(hand_range)))
+        finally:
+            with self.lock:
+                if self.pending.get(key) is hand_range:  # Sinon, une sauvegarde plus récente attend encore
+                    del self.pending[key]
+
+    def save(self, position, range_type, hand_range):
+        """Enregistre un range dans la base et dans le cache (écriture immédiate)."""
+        try:
+            self.write(position, range_type, self.remember(position, range_type, hand_range))
+            print(f"Range enregistré pour {position} ({range_type}).")
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la sauvegarde dans la base de données : {e}")
+            self.refresh(force=True)
+
+    def close(self):
+        """Ferme la connexion du cache (après l'arrêt du thread d'écriture)."""
+        with self.connection_lock:
+            self.connection.close()
+
+    def range_types(self):
+        """Types de range présents dans le cache, triés."""
+        self.refresh()
+        return sorted({range_type for _, range_type in self.ranges})
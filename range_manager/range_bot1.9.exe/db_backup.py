@@ -0,0 +1,125 @@
+# db_backup.py
+
+import os
+import sqlite3
+import time
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from db_connection import BUSY_TIMEOUT_MS
+
+BACKUP_PAGES = 1024  # Pages copiées par étape (4 Mo avec des pages de 4 Ko)
+BACKUP_PAUSE = 0.005  # Pause entre deux étapes (s) : laisse passer les écritures des autres processus
+SNAPSHOT_FOLDER = "Sauvegardes"
+SNAPSHOT_INTERVAL_MS = 30 * 60 * 1000
+SNAPSHOT_COUNT = 5  # Instantanés conservés
+
+
+def backup_database(source_path, target_path, progress=None, pages=BACKUP_PAGES):
+    """
+    Copie une base SQLite en ligne avec l'API de sauvegarde (`Connection.backup`).
+
+    La copie avance par étapes de `pages` pages : entre deux étapes, les autres connexions
+    (les autres applications de la suite) continuent de lire et d'écrire. La cible est
+    toujours cohérente, ce que ne fait pas une copie de fichier (`shutil.copy`) d'une base
+    ouverte. La cible peut elle-même être ouverte ailleurs : ses lecteurs voient l'ancienne
+    ou la nouvelle base, jamais un mélange.
+
+    Args:
+        progress (callable): progress(pages copiées, pages totales), appelé après chaque étape.
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Base introuvable : {source_path}")
+    if os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+        raise ValueError("La base source et la base cible sont le même fichier.")
+
+    def report(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+
+    source = sqlite3.connect(source_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    try:
+        # Transaction de lecture ouverte pendant toute la copie : la copie porte sur un état figé
+        # de la base. Sans elle, chaque écriture d'un autre processus relancerait la copie depuis
+        # le début (et une base très active ne serait jamais sauvegardée). En mode WAL, ce
+        # lecteur ne bloque pas les écritures.
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        target = sqlite3.connect(target_path, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            source.backup(target, pages=pages, progress=report, sleep=BACKUP_PAUSE)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def snapshot_path(db_path):
+    """Chemin d'un nouvel instantané de `db_path`, dans le dossier `Sauvegardes` voisin."""
+    folder = os.path.join(os.path.dirname(db_path), SNAPSHOT_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(folder, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.db")
+
+
+def prune_snapshots(db_path, keep=SNAPSHOT_COUNT):
+    """Supprime les instantanés les plus anciens de `db_path` au-delà de `keep`."""
+    folder = os.path.join(os.path.dirname(db_path), SNAPSHOT_FOLDER)
+    prefix = os.path.splitext(os.path.basename(db_path))[0] + "_"
+    # Le nom contient la date (AAAAMMJJ_HHMMSS) : l'ordre alphabétique est l'ordre chronologique
+    snapshots = sorted(name for name in os.listdir(folder) if name.startswith(prefix) and name.endswith(".db"))
+    for name in snapshots[:max(len(snapshots) - keep, 0)]:
+        os.remove(os.path.join(folder, name))
+
+
+class BackupWorker(QThread):
+    """
+    Sauvegarde (ou import) en arrière-plan : `source` est copiée dans `target`, ou dans un
+    nouvel instantané si `target` est None. L'avancement est transmis par `progress`.
+    """
+
+    progress = pyqtSignal(int, int)  # pages copiées, pages totales
+    completed = pyqtSignal(str)  # chemin de la copie
+    failed = pyqtSignal(str)  # message d'erreur
+
+    def __init__(self, source, target=None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.target = target
+
+    def run(self):
+        try:
+            target = self.target or snapshot_path(self.source)
+            backup_database(self.source, target, progress=self.progress.emit)
+            if self.target is None:
+                prune_snapshots(self.source)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(target)
+
+
+class SnapshotScheduler(QObject):
+    """Instantanés périodiques de la base, pris en arrière-plan toutes les `interval_ms`."""
+
+    def __init__(self, db_path, interval_ms=SNAPSHOT_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.worker = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.take_snapshot)
+        self.timer.start(interval_ms)
+
+    def take_snapshot(self):
+        if self.worker is not None and self.worker.isRunning():
+            return  # L'instantané précédent n'est pas terminé
+        self.worker = BackupWorker(self.db_path, parent=self)
+        self.worker.completed.connect(lambda path: print(f"Instantané de la base enregistré : {path}"))
+        self.worker.failed.connect(lambda error: print(f"Erreur lors de l'instantané de la base : {error}"))
+        self.worker.start()
+
+    def stop(self):
+        """Arrête les instantanés et attend la fin de celui en cours."""
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.wait()
@@ -0,0 +1,332 @@
+# equity.py
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hand_evaluator import cards_mask, evaluate_batch, parse_cards
+from preflop_matrix import preflop_equity, preflop_equity_grid
+from range_calculator import (
+    Range, COMBO_CARDS, COMBO_CLASS, COMBO_CARD_MASKS, CLASS_WEIGHTS, NUM_CLASSES, GRID_SIZE,
+    TOTAL_COMBINATIONS,
+)
+
+DEFAULT_ITERATIONS = 200_000
+# Au-delà de ce nombre de comparaisons (tirages x combos héros x combos adverses), on passe en Monte Carlo
+EXACT_BUDGET = 20_000_000
+_CHUNK_SIZE = 4_000_000  # Taille maximale des blocs de calcul, pour borner la mémoire
+
+
+def _available_weights(hand_range, known_mask):
+    """Poids des 1326 combinaisons d'un range, sans celles qui utilisent une carte connue."""
+    weights = Range.from_hands(hand_range).weights.astype(np.float64)
+    weights[(COMBO_CARD_MASKS & known_mask) != 0] = 0.0
+    return weights
+
+
+def _binomial(n, k):
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def _runouts(known_mask, remaining):
+    """Tous les tirages possibles de `remaining` cartes parmi les cartes inconnues (tableau (R, remaining))."""
+    deck = [card for card in range(52) if not known_mask >> card & 1]
+    if not remaining:
+        return np.zeros((1, 0), dtype=np.int8)
+    return np.array(list(itertools.combinations(deck, remaining)), dtype=np.int8)
+
+
+def _seven_card_hands(combos, board, runouts):
+    """Assemble les mains de 7 cartes (tirages, combos, 7) : combo + board + tirage."""
+    runout_count = len(runouts)
+    hands = np.empty((runout_count, len(combos), 7), dtype=np.int8)
+    hands[:, :, :2] = COMBO_CARDS[combos][None]
+    hands[:, :, 2:2 + len(board)] = board
+    hands[:, :, 2 + len(board):] = runouts[:, None, :]
+    return hands
+
+
+def _combo_values(combos, board, runouts, valid):
+    """Valeur (tirages, combos) de chaque combo sur chaque tirage ; seules les mains valides sont évaluées."""
+    values = np.zeros(valid.shape, dtype=np.int32)
+    values[valid] = evaluate_batch(_seven_card_hands(combos, board, runouts)[valid])
+    return values
+
+
+def _exact_combo_equities(hero_weights, villain_weights, board, known_mask):
+    """Énumération exhaustive de tous les tirages restants."""
+    heroes = np.flatnonzero(hero_weights)
+    villains = np.flatnonzero(villain_weights)
+    numerators = np.zeros(TOTAL_COMBINATIONS)
+    denominators = np.zeros(TOTAL_COMBINATIONS)
+    if not heroes.size or not villains.size:
+        return numerators, denominators
+
+    runouts = _runouts(known_mask, 5 - len(board))
+    runout_masks = np.bitwise_or.reduce(np.left_shift(1, runouts.astype(np.int64)), axis=1)
+
+    hero_masks = COMBO_CARD_MASKS[heroes]
+    villain_masks = COMBO_CARD_MASKS[villains]
+    # Poids des paires (héros, adversaire) compatibles : retrait de cartes au niveau des combos
+    pair_weights = ((hero_masks[:, None] & villain_masks[None, :]) == 0) * villain_weights[villains][None, :]
+
+    hero_wins = np.zeros(len(heroes))
+    hero_totals = np.zeros(len(heroes))
+    step = max(1, _CHUNK_SIZE // (len(heroes) * len(villains)))
+    for start in range(0, len(runouts), step):
+        chunk = runouts[start:start + step]
+        chunk_masks = runout_masks[start:start + step]
+        hero_valid = (hero_masks[None, :] & chunk_masks[:, None]) == 0
+        villain_valid = (villain_masks[None, :] & chunk_masks[:, None]) == 0
+        hero_values = _combo_values(heroes, board, chunk, hero_valid)
+        villain_values = _combo_values(villains, board, chunk, villain_valid)
+
+        weights = (hero_valid[:, :, None] & villain_valid[:, None, :]) * pair_weights[None]
+        scores = (np.sign(hero_values[:, :, None] - villain_values[:, None, :]) + 1) / 2
+        hero_wins += (weights * scores).sum(axis=(0, 2))
+        hero_totals += weights.sum(axis=(0, 2))
+
+    numerators[heroes] = hero_weights[heroes] * hero_wins
+    denominators[heroes] = hero_weights[heroes] * hero_totals
+    return numerators, denominators
+
+
+def _draw_cards(used_masks, count, rng):
+    """Tire `count` cartes par ligne, distinctes des cartes déjà utilisées (rejet vectorisé)."""
+    used_masks = used_masks.copy()
+    cards = np.empty((len(used_masks), count), dtype=np.int8)
+    for column in range(count):
+        drawn = rng.integers(0, 52, len(used_masks))
+        conflicts = np.flatnonzero((used_masks >> drawn) & 1)
+        while conflicts.size:
+            drawn[conflicts] = rng.integers(0, 52, conflicts.size)
+            conflicts = conflicts[((used_masks[conflicts] >> drawn[conflicts]) & 1) != 0]
+        cards[:, column] = drawn
+        used_masks |= np.left_shift(1, drawn.astype(np.int64))
+    return cards
+
+
+def simulate(hero_weights, villain_weights, board, known_mask, iterations, seed=None):
+    """
+    Monte Carlo vectorisé : tire des paires de combos proportionnellement aux poids
+    (les paires qui partagent une carte sont rejetées), puis les cartes du board manquantes.
+
+    Returns:
+        tuple: (combos héros, combos adversaires, scores) ; score = 1 gain, 0.5 partage, 0 perte.
+    """
+    rng = np.random.default_rng(seed)
+    hero_probabilities = hero_weights / hero_weights.sum()
+    villain_probabilities = villain_weights / villain_weights.sum()
+
+    heroes = rng.choice(TOTAL_COMBINATIONS, iterations, p=hero_probabilities)
+    villains = rng.choice(TOTAL_COMBINATIONS, iterations, p=villain_probabilities)
+    conflicts = np.flatnonzero(COMBO_CARD_MASKS[heroes] & COMBO_CARD_MASKS[villains])
+    for _ in range(100):
+        if not conflicts.size:
+            break
+        heroes[conflicts] = rng.choice(TOTAL_COMBINATIONS, conflicts.size, p=hero_probabilities)
+        villains[conflicts] = rng.choice(TOTAL_COMBINATIONS, conflicts.size, p=villain_probabilities)
+        conflicts = conflicts[(COMBO_CARD_MASKS[heroes[conflicts]] & COMBO_CARD_MASKS[villains[conflicts]]) != 0]
+    if conflicts.size:  # Paires impossibles (ranges entièrement bloqués) : on les écarte
+        keep = np.ones(iterations, dtype=bool)
+        keep[conflicts] = False
+        heroes, villains = heroes[keep], villains[keep]
+
+    used_masks = COMBO_CARD_MASKS[heroes] | COMBO_CARD_MASKS[villains] | known_mask
+    runouts = _draw_cards(used_masks, 5 - len(board), rng)
+
+    hands = np.empty((len(heroes), 7), dtype=np.int8)
+    hands[:, 2:2 + len(board)] = board
+    hands[:, 2 + len(board):] = runouts
+    hands[:, :2] = COMBO_CARDS[heroes]
+    hero_values = evaluate_batch(hands).astype(np.int32)
+    hands[:, :2] = COMBO_CARDS[villains]
+    villain_values = evaluate_batch(hands)
+
+    scores = (np.sign(hero_values - villain_values) + 1) / 2
+    return heroes, villains, scores
+
+
+def _monte_carlo_worker(hero_weights, villain_weights, board, known_mask, iterations, seed):
+    heroes, _, scores = simulate(hero_weights, villain_weights, board, known_mask, iterations, seed)
+    return (
+        np.bincount(heroes, weights=scores, minlength=TOTAL_COMBINATIONS),
+        np.bincount(heroes, minlength=TOTAL_COMBINATIONS).astype(np.float64),
+    )
+
+
+def _worker_count(workers):
+    if workers is None:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def combo_equities(hero, villain, board=(), dead=(), iterations=DEFAULT_ITERATIONS,
+                   exact_budget=EXACT_BUDGET, workers=1, seed=None):
+    """
+    Calcule, pour chaque combinaison du héros, la somme pondérée de ses gains et de ses confrontations.
+
+    L'énumération exacte est utilisée lorsque (tirages x combos héros x combos adverses) reste
+    sous `exact_budget`, sinon un Monte Carlo vectorisé de `iterations` tirages, réparti sur
+    `workers` processus (None = tous les cœurs).
+
+    Returns:
+        tuple: (numérateurs, dénominateurs) de taille 1326 ; équité = numérateur / dénominateur.
+    """
+    board = parse_cards(board)
+    known_mask = cards_mask(board) | cards_mask(dead)
+    hero_weights = _available_weights(hero, known_mask)
+    villain_weights = _available_weights(villain, known_mask)
+    if not hero_weights.any() or not villain_weights.any():
+        return np.zeros(TOTAL_COMBINATIONS), np.zeros(TOTAL_COMBINATIONS)
+
+    runout_count = _binomial(52 - bin(known_mask).count("1"), 5 - len(board))
+    cost = runout_count * np.count_nonzero(hero_weights) * np.count_nonzero(villain_weights)
+    if cost <= exact_budget:
+        return _exact_combo_equities(hero_weights, villain_weights, board, known_mask)
+
+    workers = _worker_count(workers)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [iterations // workers + (i < iterations % workers) for i in range(workers)]
+    arguments = [(hero_weights, villain_weights, board, known_mask, share, child) for share, child in zip(shares, seeds)]
+    if workers == 1:
+        results = [_monte_carlo_worker(*arguments[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_monte_carlo_worker, *zip(*arguments)))
+
+    numerators = sum(result[0] for result in results)
+    denominators = sum(result[1] for result in results)
+    return numerators, denominators
+
+
+def range_equity(hero, villain, board=(), dead=(), use_matrix=True, **kwargs):
+    """
+    Équité (0 à 1) du range `hero` contre le range `villain` (voir `combo_equities`).
+
+    Préflop sans carte morte, la matrice précalculée (`preflop_matrix`) est utilisée si elle existe.
+    """
+    if use_matrix and not board and not dead:
+        equity = preflop_equity(hero, villain)
+        if equity is not None:
+            return equity
+    numerators, denominators = combo_equities(hero, villain, board, dead, **kwargs)
+    total = denominators.sum()
+    return float(numerators.sum() / total) if total else float("nan")
+
+
+def hand_equity_grid(hero, villain, board=(), dead=(), use_matrix=True, **kwargs):
+    """
+    Équité de chaque case de la grille 13x13 du héros contre le range adverse.
+
+    Returns:
+        np.ndarray: Tableau (13, 13) ; NaN pour les cases absentes du range du héros.
+    """
+    if use_matrix and not board and not dead:
+        grid = preflop_equity_grid(hero, villain)
+        if grid is not None:
+            return grid
+    return _class_grid(*combo_equities(hero, villain, board, dead, **kwargs))
+
+
+def _class_grid(numerators, denominators):
+    class_numerators = np.bincount(COMBO_CLASS, weights=numerators, minlength=NUM_CLASSES)
+    class_denominators = np.bincount(COMBO_CLASS, weights=denominators, minlength=NUM_CLASSES)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grid = np.where(class_denominators > 0, class_numerators / class_denominators, np.nan)
+    return grid.reshape(GRID_SIZE, GRID_SIZE)
+
+
+def stored_range_equity(hero_position, hero_type, villain_position, villain_type, board=(), use_matrix=True,
+                        use_cache=True, **kwargs):
+    """
+    Équité d'un range enregistré contre un autre (ex: BTN "Open" contre BB "Call 3-Bet").
+    Les résultats sont conservés dans le cache des solutions (spot ramené à sa forme canonique).
+
+    Returns:
+        tuple: (équité globale, grille 13x13 des équités par main du héros).
+    """
+    from database_range import load_range
+
+    hero = load_range(hero_position, hero_type)
+    villain = load_range(villain_position, villain_type)
+    if use_matrix and not board and not kwargs.get("dead"):
+        equity = preflop_equity(hero, villain)
+        if equity is not None:
+            return equity, preflop_equity_grid(hero, villain)
+
+    if use_cache and not kwargs.get("dead"):
+        from solution_store import default_store
+
+        result = default_store().get_or_compute(
+            "equity",
+            lambda canonical, ranges: dict(zip(("numerators", "denominators"),
+                                               combo_equities(*ranges, canonical, **kwargs))),
+            board=board, ranges=[hero, villain], per_combo=("numerators", "denominators"), **kwargs,
+        )
+        numerators, denominators = result["numerators"], result["denominators"]
+    else:
+        numerators, denominators = combo_equities(hero, villain, board, **kwargs)
+    total = denominators.sum()
+    return (float(numerators.sum() / total) if total else float("nan")), _class_grid(numerators, denominators)
+
+
+def _matchup_row(hero_class, iterations, seed):
+    """Équité de la classe `hero_class` contre chacune des 169 classes (une ligne de la matrice)."""
+    hero_weights = (COMBO_CLASS == hero_class).astype(np.float64)
+    # Chaque classe adverse reçoit le même nombre de tirages, uniformes parmi ses combinaisons
+    villain_weights = 1.0 / CLASS_WEIGHTS[COMBO_CLASS].astype(np.float64)
+    _, villains, scores = simulate(hero_weights, villain_weights, [], 0, iterations, seed)
+    villain_classes = COMBO_CLASS[villains]
+    wins = np.bincount(villain_classes, weights=scores, minlength=NUM_CLASSES)
+    samples = np.bincount(villain_classes, minlength=NUM_CLASSES).astype(np.float64)
+    return wins, samples
+
+
+def matchup_combo_counts():
+    """Nombre de paires de combinaisons compatibles (sans carte commune) pour chaque couple de classes."""
+    compatible = ((COMBO_CARD_MASKS[:, None] & COMBO_CARD_MASKS[None, :]) == 0).astype(np.float32)
+    one_hot = np.zeros((TOTAL_COMBINATIONS, NUM_CLASSES), dtype=np.float32)
+    one_hot[np.arange(TOTAL_COMBINATIONS), COMBO_CLASS] = 1.0
+    return np.rint(one_hot.T @ compatible @ one_hot).astype(np.int32)
+
+
+def matchup_grid(iterations_per_cell=2_000, workers=None, seed=None):
+    """
+    Matrice 169x169 des équités préflop classe contre classe, calculée ligne par ligne
+    en parallèle (ProcessPoolExecutor). Les estimations (i, j) et 1 - (j, i) sont fusionnées
+    pour réduire la variance.
+
+    Returns:
+        tuple: (équités (169, 169) float32, nombre de paires de combos compatibles (169, 169)).
+    """
+    workers = _worker_count(workers)
+    seeds = np.random.SeedSequence(seed).spawn(NUM_CLASSES)
+    iterations = iterations_per_cell * NUM_CLASSES
+    arguments = [(hero_class, iterations, seeds[hero_class]) for hero_class in range(NUM_CLASSES)]
+    if workers == 1:
+        rows = [_matchup_row(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_matchup_row, *zip(*arguments), chunksize=4))
+
+    wins = np.array([row[0] for row in rows])
+    samples = np.array([row[1] for row in rows])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        equities = (wins + samples.T - wins.T) / (samples + samples.T)
+    return equities.astype(np.float32), matchup_combo_counts()
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    print("AA vs KK :", range_equity(["AA"], ["KK"], seed=0))
+    print("AKs vs QQ sur AhKh7c :", range_equity(["AKs"], ["QQ"], board="AhKh7c"))
+    equities, _ = matchup_grid(iterations_per_cell=1_000, seed=0)
+    print(f"Matrice 169x169 calculée en {time.perf_counter() - start:.1f} s")
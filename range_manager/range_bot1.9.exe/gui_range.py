@@ -1,12 +1,16 @@
 import sys
+import config
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QGridLayout, QVBoxLayout, QHBoxLayout,
-    QWidget, QLabel, QLineEdit, QComboBox, QPushButton
+    QWidget, QLabel, QLineEdit, QComboBox, QPushButton, QSpinBox, QFileDialog
 )
 from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve
 from PyQt5.QtGui import QIcon
-from range_calculator import get_hands_for_percentage, calculate_percentage
-from database_range import save_range, load_range, create_table
+from range_calculator import Range, HAND_CLASSES, GRID_SIZE, get_hands_for_percentage
+from database_range import RangeCache, create_table
+from persistence_worker import PersistenceWorker
+from db_backup import BackupWorker, SnapshotScheduler
+from range_pack import export_pack, import_pack
 
 
 class RangeSelector(QMainWindow):
@@ -19,7 +23,7 @@ class RangeSelector(QMainWindow):
         self.setMinimumSize(900, 1000)
 
         # Variables
-        self.range = set()
+        self.range = Range()
         self.hands_grid = self.generate_hands_grid()
         self.positions = ["UTG", "UTG+1", "UTG+2", "LJ", "HJ", "CO", "BTN", "SB", "BB"]
         self.range_types = ["Open", "3-Bet", "4-Bet", "Call 3-Bet"]
@@ -37,24 +41,34 @@ class RangeSelector(QMainWindow):
         # Crée la table dans la base de données
         create_table()
 
+        # Tous les ranges sont chargés une fois ; les changements de position/type restent en mémoire
+        self.range_cache = RangeCache()
+
+        # Les sauvegardes sont écrites en arrière-plan ; l'animation s'affiche une fois l'écriture faite
+        self.persistence = PersistenceWorker(self)
+        self.persistence.saved.connect(self.on_range_saved)
+        self.persistence.failed.connect(self.on_range_save_failed)
+
+        # Instantanés périodiques de la base, pris en arrière-plan
+        self.backup_worker = None
+        self.snapshots = SnapshotScheduler(config.DB_PATH, parent=self)
+
+        # Ajoute les types enregistrés hors de la liste par défaut (ex: charts push/fold)
+        self.add_stored_range_types()
+
         # Charge le range initial pour la position et le type sélectionnés
         self.load_range()
 
+    def add_stored_range_types(self):
+        """Ajoute au sélecteur les types de range enregistrés qui n'y figurent pas encore."""
+        for range_type in self.range_cache.range_types():
+            if range_type not in self.range_types:
+                self.range_types.append(range_type)
+                self.range_type_select.addItem(range_type)
+
     def generate_hands_grid(self):
-        """Génère une structure organisée des mains."""
-        ranks = "AKQJT98765432"
-        grid = []
-        for i, rank1 in enumerate(ranks):
-            row = []
-            for j, rank2 in enumerate(ranks):
-                if i == j:
-                    row.append(f"{rank1}{rank2}")  # Paires
-                elif i < j:
-                    row.append(f"{rank1}{rank2}s")  # Suited
-                else:
-                    row.append(f"{rank2}{rank1}o")  # Offsuit
-            grid.append(row)
-        return grid
+        """Génère une structure organisée des mains (même indexation que le masque de `Range`)."""
+        return [HAND_CLASSES[i * GRID_SIZE:(i + 1) * GRID_SIZE] for i in range(GRID_SIZE)]
 
     def init_ui(self):
         # Affichage du pourcentage des mains jouées
@@ -66,6 +80,13 @@ class RangeSelector(QMainWindow):
         self.percentage_input.setAlignment(Qt.AlignCenter)
         self.percentage_input.returnPressed.connect(self.apply_percentage)
 
+        # Fréquence appliquée aux mains cliquées (stratégies mixtes, ex: AQo 3-bet à 40 %)
+        self.frequency_select = QSpinBox(self)
+        self.frequency_select.setRange(5, 100)
+        self.frequency_select.setSingleStep(5)
+        self.frequency_select.setValue(100)
+        self.frequency_select.setSuffix(" %")
+
         # Sélection de la position
         self.position_select = QComboBox(self)
         self.position_select.addItems(self.positions)
@@ -79,18 +100,22 @@ class RangeSelector(QMainWindow):
         # Ajouter au layout des informations
         self.info_layout.addWidget(self.percentage_label)
         self.info_layout.addWidget(self.percentage_input)
+        self.info_layout.addWidget(QLabel("Fréquence :", self))
+        self.info_layout.addWidget(self.frequency_select)
         self.info_layout.addWidget(QLabel("Position :", self))
         self.info_layout.addWidget(self.position_select)
         self.info_layout.addWidget(QLabel("Type :", self))
         self.info_layout.addWidget(self.range_type_select)
 
-        # Grille de mains
+        # Grille de mains (boutons rangés dans l'ordre des classes de `Range`)
+        self.hand_buttons = []
         for i, row in enumerate(self.hands_grid):
             for j, hand in enumerate(row):
                 button = QPushButton(hand, self)
                 button.setCheckable(True)
                 button.setFixedSize(50, 50)  # Dimensions initiales des boutons
                 button.clicked.connect(lambda checked, h=hand: self.toggle_hand(h, checked))
+                self.hand_buttons.append(button)
                 self.grid_layout.addWidget(button, i, j)
 
         # Bouton Sauvegarder
@@ -98,10 +123,23 @@ class RangeSelector(QMainWindow):
         self.save_button.setFixedHeight(40)
         self.save_button.clicked.connect(self.save_range)
 
+        # Import / export de packs de ranges (un fichier par site, limite ou format)
+        self.pack_layout = QHBoxLayout()
+        self.import_button = QPushButton("Importer un pack", self)
+        self.import_button.clicked.connect(self.import_pack)
+        self.export_button = QPushButton("Exporter un pack", self)
+        self.export_button.clicked.connect(self.export_pack)
+        self.backup_button = QPushButton("Sauvegarder la base", self)
+        self.backup_button.clicked.connect(self.backup_database)
+        self.pack_layout.addWidget(self.import_button)
+        self.pack_layout.addWidget(self.export_button)
+        self.pack_layout.addWidget(self.backup_button)
+
         # Ajouter les layouts
         self.main_layout.addLayout(self.info_layout)
         self.main_layout.addLayout(self.grid_layout)
         self.main_layout.addWidget(self.save_button)
+        self.main_layout.addLayout(self.pack_layout)
 
         # Ajuster automatiquement les tailles
         self.central_widget.setLayout(self.main_layout)
@@ -123,25 +161,23 @@ class RangeSelector(QMainWindow):
         super().resizeEvent(event)
 
     def toggle_hand(self, hand, checked):
-        """Ajoute ou retire une main du range."""
-        if checked:
-            self.range.add(hand)
-        else:
-            self.range.discard(hand)
+        """Ajoute (à la fréquence sélectionnée) ou retire une main du range."""
+        frequency = self.frequency_select.value() / 100 if checked else 0.0
+        self.range.set_frequency(hand, frequency)
 
+        self.update_buttons()
         self.update_percentage()
 
     def update_percentage(self):
         """Met à jour le pourcentage des mains jouées."""
-        percentage = calculate_percentage(self.range)
+        percentage = self.range.percentage
         self.percentage_label.setText(f"Pourcentage des mains jouées : {percentage:.2f}%")
 
     def apply_percentage(self):
         """Applique un range basé sur un pourcentage."""
         try:
             percentage = float(self.percentage_input.text())
-            hands = get_hands_for_percentage(percentage)
-            self.range = set(hands)
+            self.range = get_hands_for_percentage(percentage)
             self.update_buttons()
             self.update_percentage()
         except ValueError:
@@ -149,31 +185,86 @@ class RangeSelector(QMainWindow):
 
     def update_buttons(self):
         """Met à jour l'état des boutons en fonction du range sélectionné."""
-        for i in range(self.grid_layout.count()):
-            button = self.grid_layout.itemAt(i).widget()
-            button.setChecked(button.text() in self.range)
+        frequencies = self.range.class_frequencies
+        for button, hand, frequency in zip(self.hand_buttons, HAND_CLASSES, frequencies):
+            button.setChecked(bool(frequency > 0))
+            # Affiche la fréquence dans la case lorsqu'elle est partielle
+            button.setText(f"{hand}\n{frequency:.0%}" if 0 < frequency < 1 else hand)
 
     def save_range(self):
         """Enregistre le range sélectionné avec la position et le type."""
         position = self.position_select.currentText()
         range_type = self.range_type_select.currentText()
-        save_range(position, range_type, list(self.range))
-        print(f"Range sauvegardé pour {position} ({range_type}) : {sorted(self.range)}")
+        # Copie : le range affiché peut être modifié avant que l'écriture ait lieu
+        hand_range = self.range_cache.remember(position, range_type, self.range)
+        self.persistence.submit((position, range_type), self.range_cache.write, position, range_type, hand_range)
+
+    def on_range_saved(self, key):
+        """Appelé (thread de l'interface) quand un range a été écrit en base."""
+        position, range_type = key
+        print(f"Range sauvegardé pour {position} ({range_type}).")
 
         # Affiche l'animation de confirmation
         self.show_save_animation()
 
+    def on_range_save_failed(self, key, error):
+        position, range_type = key
+        print(f"Erreur lors de la sauvegarde du range {position} ({range_type}) : {error}")
+        # Le cache revient au contenu de la base ; le range affiché reste modifiable et réenregistrable
+        self.range_cache.refresh(force=True)
+
+    def closeEvent(self, event):
+        # Termine les sauvegardes en attente avant de quitter
+        self.persistence.stop()
+        self.range_cache.close()
+        self.snapshots.stop()
+        if self.backup_worker is not None:
+            self.backup_worker.wait()
+        super().closeEvent(event)
+
+    def import_pack(self):
+        """Importe un pack de ranges choisi par l'utilisateur puis recharge l'affichage."""
+        path, _ = QFileDialog.getOpenFileName(self, "Importer un pack de ranges", "", "Packs de ranges (*.jsonl);;All Files (*)")
+        if not path or not import_pack(path):
+            return
+        # Rechargement immédiat, sans attendre la prochaine vérification de `data_version`
+        self.range_cache.refresh(force=True)
+        self.add_stored_range_types()
+        self.load_range()
+
+    def export_pack(self):
+        """Exporte tous les ranges dans un pack choisi par l'utilisateur."""
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter un pack de ranges", "ranges.jsonl", "Packs de ranges (*.jsonl)")
+        if path:
+            export_pack(path)
+
+    def backup_database(self):
+        """Copie la base complète dans un fichier choisi par l'utilisateur, en arrière-plan."""
+        path, _ = QFileDialog.getSaveFileName(self, "Sauvegarder la base de données", "poker_bot_sauvegarde.db", "SQLite Files (*.db)")
+        if not path:
+            return
+        self.backup_button.setEnabled(False)
+        self.backup_worker = BackupWorker(config.DB_PATH, path, parent=self)
+        self.backup_worker.progress.connect(
+            lambda copied, total: self.statusBar().showMessage(f"Sauvegarde de la base : {copied / max(total, 1):.0%}")
+        )
+        self.backup_worker.completed.connect(lambda path: self.on_backup_finished(f"Base sauvegardée : {path}"))
+        self.backup_worker.failed.connect(lambda error: self.on_backup_finished(f"Échec de la sauvegarde : {error}"))
+        self.backup_worker.start()
+
+    def on_backup_finished(self, message):
+        self.backup_button.setEnabled(True)
+        self.statusBar().showMessage(message, 5000)
+
     def load_range(self):
-        """Charge un range depuis la base de données."""
+        """Charge un range depuis le cache (relu depuis la base seulement si elle a changé)."""
         position = self.position_select.currentText()
         range_type = self.range_type_select.currentText()
-        hands = load_range(position, range_type)
+        self.range = self.range_cache.get(position, range_type)
 
-        if hands:
-            self.range = set(hands)
-            print(f"Range chargée pour {position} ({range_type}) : {hands}")
+        if self.range:
+            print(f"Range chargée pour {position} ({range_type}) : {self.range.to_hands()}")
         else:
-            self.range = set()
             print(f"Aucun range trouvé pour {position} ({range_type}).")
 
         self.update_buttons()
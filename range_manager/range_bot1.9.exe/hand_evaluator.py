@@ -0,0 +1,247 @@
+# hand_evaluator.py
+
+import itertools
+import time
+
+import numpy as np
+
+from range_calculator import RANKS, SUITS
+
+# Catégories de mains (la valeur d'une main croît avec la catégorie)
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+CATEGORY_NAMES = [
+    "Hauteur", "Paire", "Double paire", "Brelan", "Quinte",
+    "Couleur", "Full", "Carré", "Quinte flush",
+]
+
+# Clés de rang : la somme des clés de 7 cartes (4 exemplaires max par rang) est unique
+# pour chaque multiensemble de rangs, ce qui en fait un hachage parfait de la main sans couleur.
+RANK_KEYS = [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181]
+# Clés de couleur : 3 bits par couleur, la somme compte les cartes de chaque couleur
+SUIT_KEYS = [1, 1 << 3, 1 << 6, 1 << 9]
+SUIT_SHIFT = 24  # Clé de carte = (clé de couleur << 24) | clé de rang
+RANK_KEY_MASK = (1 << SUIT_SHIFT) - 1
+
+CARD_KEYS = np.array(
+    [(SUIT_KEYS[card % 4] << SUIT_SHIFT) | RANK_KEYS[card // 4] for card in range(52)], dtype=np.int64
+)
+CARD_RANK_BITS = np.array([1 << (card // 4) for card in range(52)], dtype=np.int32)
+CARD_SUITS = np.array([card % 4 for card in range(52)], dtype=np.int8)
+
+_STRAIGHTS = [(0b1111100000000 >> shift, 12 - shift) for shift in range(9)] + [(0b1000000001111, 3)]
+
+
+def card_index(card):
+    """Convertit une carte texte (ex: "Ah", "Td") en index 0-51 (rang * 4 + couleur)."""
+    return RANKS.index(card[0].upper()) * 4 + SUITS.index(card[1].lower())
+
+
+def parse_cards(cards):
+    """Convertit "AhKd" ou ["Ah", "Kd"] en liste d'index de cartes."""
+    if isinstance(cards, str):
+        cards = [cards[i:i + 2] for i in range(0, len(cards), 2)]
+    return [card if isinstance(card, (int, np.integer)) else card_index(card) for card in cards]
+
+
+def cards_mask(cards):
+    """Masque 52 bits d'une liste de cartes (index ou texte)."""
+    mask = 0
+    for card in parse_cards(cards):
+        mask |= 1 << card
+    return mask
+
+
+def _straight_top(rank_bits):
+    """Rang de la carte haute de la meilleure quinte contenue dans `rank_bits`, sinon -1."""
+    for pattern, top in _STRAIGHTS:
+        if rank_bits & pattern == pattern:
+            return top
+    return -1
+
+
+def _top_ranks(rank_bits, count):
+    ranks = [rank for rank in range(12, -1, -1) if rank_bits >> rank & 1]
+    return tuple(ranks[:count])
+
+
+def _flush_score(rank_bits):
+    """Meilleure main (tuple comparable) parmi des cartes d'une même couleur."""
+    top = _straight_top(rank_bits)
+    if top >= 0:
+        return (STRAIGHT_FLUSH, top)
+    return (FLUSH,) + _top_ranks(rank_bits, 5)
+
+
+def _rank_score(counts):
+    """Meilleure main sans couleur (tuple comparable) à partir du nombre de cartes par rang."""
+    ranks_desc = [rank for rank in range(12, -1, -1) if counts[rank]]
+    quads = [rank for rank in ranks_desc if counts[rank] == 4]
+    trips = [rank for rank in ranks_desc if counts[rank] == 3]
+    pairs = [rank for rank in ranks_desc if counts[rank] == 2]
+
+    def kickers(excluded, count):
+        return tuple(rank for rank in ranks_desc if rank not in excluded)[:count]
+
+    if quads:
+        return (QUADS, quads[0]) + kickers(quads[:1], 1)
+    if trips and len(trips) + len(pairs) >= 2:
+        pair = max(trips[1:] + pairs)
+        return (FULL_HOUSE, trips[0], pair)
+    top = _straight_top(sum(1 << rank for rank in ranks_desc))
+    if top >= 0:
+        return (STRAIGHT, top)
+    if trips:
+        return (TRIPS, trips[0]) + kickers(trips[:1], 2)
+    if len(pairs) >= 2:
+        return (TWO_PAIR, pairs[0], pairs[1]) + kickers(pairs[:2], 1)
+    if pairs:
+        return (PAIR, pairs[0]) + kickers(pairs[:1], 3)
+    return (HIGH_CARD,) + tuple(ranks_desc[:5])
+
+
+def _rank_multisets(size):
+    """Énumère les répartitions de `size` cartes sur 13 rangs (4 cartes max par rang)."""
+    for ranks in itertools.combinations_with_replacement(range(13), size):
+        counts = [0] * 13
+        for rank in ranks:
+            counts[rank] += 1
+        if max(counts) <= 4:
+            yield counts
+
+
+def _build_tables():
+    """
+    Construit les tables de correspondance :
+    - valeur (1 à 7462) de chaque classe d'équivalence de 5 cartes, la plus forte étant la plus haute ;
+    - table sans couleur indexée par la somme des clés de rang de 7 cartes ;
+    - table des couleurs indexée par le masque 13 bits des rangs de la couleur ;
+    - couleur à 5 cartes ou plus (ou -1) indexée par la somme des clés de couleur.
+    """
+    scores = set()
+    for counts in _rank_multisets(5):
+        scores.add(_rank_score(counts))
+    for ranks in itertools.combinations(range(13), 5):
+        scores.add(_flush_score(sum(1 << rank for rank in ranks)))
+    ordered_scores = sorted(scores)
+    score_values = {score: value for value, score in enumerate(ordered_scores, start=1)}
+    category_starts = np.zeros(9, dtype=np.uint16)
+    for value, score in reversed(list(enumerate(ordered_scores, start=1))):
+        category_starts[score[0]] = value  # Première (plus faible) valeur de chaque catégorie
+
+    rank_table = np.zeros(4 * RANK_KEYS[12] + 3 * RANK_KEYS[11] + 1, dtype=np.uint16)
+    for counts in _rank_multisets(7):
+        key = sum(RANK_KEYS[rank] * count for rank, count in enumerate(counts))
+        if rank_table[key]:
+            raise RuntimeError("Collision dans la table des rangs : clés de rang invalides.")
+        rank_table[key] = score_values[_rank_score(counts)]
+
+    flush_table = np.zeros(1 << 13, dtype=np.uint16)
+    for rank_bits in range(1 << 13):
+        if bin(rank_bits).count("1") >= 5:
+            flush_table[rank_bits] = score_values[_flush_score(rank_bits)]
+
+    flush_suits = np.full(SUIT_KEYS[3] * 8, -1, dtype=np.int8)
+    for suit_key in range(len(flush_suits)):
+        for suit in range(4):
+            if (suit_key >> (3 * suit)) & 7 >= 5:
+                flush_suits[suit_key] = suit
+
+    return rank_table, flush_table, flush_suits, category_starts
+
+
+RANK_TABLE, FLUSH_TABLE, FLUSH_SUITS, CATEGORY_STARTS = _build_tables()
+MAX_HAND_VALUE = 7462
+
+# Accès scalaires plus rapides que l'indexation NumPy pour `evaluate`
+_RANK_TABLE = memoryview(RANK_TABLE)
+_CARD_KEYS = CARD_KEYS.tolist()
+_CARD_RANK_BITS = CARD_RANK_BITS.tolist()
+_FLUSH_SUITS = FLUSH_SUITS.tolist()
+_FLUSH_TABLE = FLUSH_TABLE.tolist()
+
+
+def evaluate(cards):
+    """
+    Évalue une main de 7 cartes (index 0-51).
+
+    Returns:
+        int: Valeur de la main, de 1 (7-5-4-3-2 dépareillé) à 7462 (quinte flush royale).
+    """
+    c1, c2, c3, c4, c5, c6, c7 = cards
+    keys = _CARD_KEYS
+    key = keys[c1] + keys[c2] + keys[c3] + keys[c4] + keys[c5] + keys[c6] + keys[c7]
+    value = _RANK_TABLE[key & RANK_KEY_MASK]
+
+    flush_suit = _FLUSH_SUITS[key >> SUIT_SHIFT]
+    if flush_suit < 0:
+        return value
+    rank_bits = 0
+    for card in cards:
+        if card & 3 == flush_suit:
+            rank_bits |= _CARD_RANK_BITS[card]
+    return max(value, _FLUSH_TABLE[rank_bits])
+
+
+def evaluate_batch(cards):
+    """
+    Évalue un lot de mains de 7 cartes en une seule passe vectorisée.
+
+    Args:
+        cards (np.ndarray): Tableau d'entiers (N, 7) d'index de cartes.
+
+    Returns:
+        np.ndarray: Valeurs (N,) uint16 des mains.
+    """
+    cards = np.asarray(cards)
+    keys = CARD_KEYS[cards].sum(axis=1)
+    values = RANK_TABLE[keys & RANK_KEY_MASK]
+
+    flush_suits = FLUSH_SUITS[keys >> SUIT_SHIFT]
+    flushed = np.flatnonzero(flush_suits >= 0)
+    if flushed.size:
+        flush_cards = cards[flushed]
+        in_suit = CARD_SUITS[flush_cards] == flush_suits[flushed, None]
+        # Les bits de rang d'une même couleur sont distincts : la somme vaut le OU binaire
+        rank_bits = np.where(in_suit, CARD_RANK_BITS[flush_cards], 0).sum(axis=1)
+        values[flushed] = np.maximum(values[flushed], FLUSH_TABLE[rank_bits])
+    return values
+
+
+def hand_category(values):
+    """Catégorie (HIGH_CARD ... STRAIGHT_FLUSH) d'une valeur ou d'un tableau de valeurs."""
+    categories = np.searchsorted(CATEGORY_STARTS, values, side="right") - 1
+    return int(categories) if np.ndim(categories) == 0 else categories
+
+
+def random_hands(count, size=7, seed=None):
+    """Génère `count` mains aléatoires de `size` cartes distinctes (tableau (count, size))."""
+    rng = np.random.default_rng(seed)
+    hands = np.empty((count, size), dtype=np.int8)
+    chunk = 100_000
+    for start in range(0, count, chunk):
+        stop = min(start + chunk, count)
+        hands[start:stop] = np.argsort(rng.random((stop - start, 52)), axis=1)[:, :size]
+    return hands
+
+
+def benchmark(count=2_000_000):
+    """Mesure le débit de l'évaluateur (mains par seconde) en mode unitaire et en lot."""
+    hands = random_hands(count, seed=0)
+
+    start = time.perf_counter()
+    evaluate_batch(hands)
+    batch_elapsed = time.perf_counter() - start
+
+    sample = hands[:200_000].tolist()
+    start = time.perf_counter()
+    for hand in sample:
+        evaluate(hand)
+    single_elapsed = time.perf_counter() - start
+
+    print(f"Lot      : {count:,} mains en {batch_elapsed:.3f} s ({count / batch_elapsed:,.0f} mains/s)")
+    print(f"Unitaire : {len(sample):,} mains en {single_elapsed:.3f} s "
+          f"({len(sample) / single_elapsed:,.0f} mains/s, {single_elapsed / len(sample) * 1e9:.0f} ns/main)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,152 @@
+# isomorphism.py
+
+import itertools
+
+import numpy as np
+
+from hand_evaluator import RANKS, SUITS, parse_cards
+from range_calculator import Range, COMBO_CARDS, TOTAL_COMBINATIONS
+
+# Les 24 permutations de couleurs et leur effet sur les cartes et les combinaisons
+SUIT_PERMUTATIONS = np.array(list(itertools.permutations(range(4))), dtype=np.int64)
+CARD_PERMUTATIONS = (np.arange(52) // 4 * 4)[None, :] + SUIT_PERMUTATIONS[:, np.arange(52) % 4]
+
+
+def _build_combo_permutations():
+    """COMBO_PERMUTATIONS[p, c] : index de la combinaison c après la permutation de couleurs p."""
+    combo_index = np.full((52, 52), -1, dtype=np.int16)
+    combo_index[COMBO_CARDS[:, 0], COMBO_CARDS[:, 1]] = np.arange(TOTAL_COMBINATIONS)
+    combo_index[COMBO_CARDS[:, 1], COMBO_CARDS[:, 0]] = np.arange(TOTAL_COMBINATIONS)
+    first = CARD_PERMUTATIONS[:, COMBO_CARDS[:, 0]]
+    second = CARD_PERMUTATIONS[:, COMBO_CARDS[:, 1]]
+    return combo_index[first, second]
+
+
+COMBO_PERMUTATIONS = _build_combo_permutations()
+
+
+def _board_key(cards):
+    """Clé d'un board : le flop est un ensemble (trié), turn et river gardent leur ordre."""
+    return tuple(sorted(cards[:3], reverse=True)) + tuple(cards[3:])
+
+
+def board_to_text(cards):
+    return "".join(RANKS[card // 4] + SUITS[card % 4] for card in cards)
+
+
+def canonical_board(board):
+    """
+    Représentant isomorphe d'un board (la plus petite clé parmi les 24 permutations de couleurs).
+
+    Returns:
+        tuple: (cartes du board canonique, liste des permutations qui y mènent).
+    """
+    cards = parse_cards(board)
+    keys = [_board_key(CARD_PERMUTATIONS[p, cards].tolist()) for p in range(len(SUIT_PERMUTATIONS))]
+    best = min(keys)
+    return best, [p for p, key in enumerate(keys) if key == best]
+
+
+def permute_weights(weights, permutation):
+    """Applique une permutation de couleurs à un vecteur de 1326 valeurs par combinaison."""
+    permuted = np.empty_like(weights)
+    permuted[COMBO_PERMUTATIONS[permutation]] = weights
+    return permuted
+
+
+def canonical_spot(board, ranges=()):
+    """
+    Ramène un spot (board et ranges des joueurs) à son représentant isomorphe.
+
+    Parmi les permutations qui donnent le board canonique, on retient celle qui donne les plus
+    petits vecteurs de poids : deux spots équivalents par couleur ont alors exactement la même clé.
+
+    Returns:
+        tuple: (board canonique, liste des ranges canoniques, index de la permutation appliquée).
+    """
+    canonical, permutations = canonical_board(board)
+    weights = [Range.from_hands(hand_range).weights for hand_range in ranges]
+    if not weights:
+        return canonical, [], permutations[0]
+
+    candidates = [
+        (b"".join(permute_weights(w, p).astype(np.float16).tobytes() for w in weights), p)
+        for p in permutations
+    ]
+    _, permutation = min(candidates)
+    return canonical, [Range.from_weights(permute_weights(w, permutation)) for w in weights], permutation
+
+
+def canonicalize(board, hand_range=None):
+    """
+    Ramène une paire (board, range) à son représentant isomorphe (voir `canonical_spot`).
+
+    Returns:
+        tuple: (board canonique, range canonique ou None, index de la permutation appliquée).
+    """
+    if hand_range is None:
+        canonical, _, permutation = canonical_spot(board)
+        return canonical, None, permutation
+    canonical, (canonical_range,), permutation = canonical_spot(board, [hand_range])
+    return canonical, canonical_range, permutation
+
+
+def restore_combos(values, permutation):
+    """Remet un résultat par combinaison (calculé sur le spot canonique) dans les couleurs d'origine."""
+    return np.asarray(values)[..., COMBO_PERMUTATIONS[permutation]]
+
+
+def strategic_flops():
+    """
+    Les 1 755 flops stratégiquement distincts.
+
+    Returns:
+        tuple: (flops canoniques (1755, 3), nombre de flops réels représentés par chacun (somme = 22 100)).
+    """
+    flops = np.array(list(itertools.combinations(range(52), 3)), dtype=np.int64)
+    mapped = -np.sort(-CARD_PERMUTATIONS[:, flops], axis=2)  # (24, 22100, 3), ordre décroissant
+    codes = (mapped[..., 0] * 52 + mapped[..., 1]) * 52 + mapped[..., 2]
+    unique_codes, counts = np.unique(codes.min(axis=0), return_counts=True)
+    canonical = np.stack([unique_codes // 2704, unique_codes // 52 % 52, unique_codes % 52], axis=1)
+    return canonical.astype(np.int8), counts
+
+
+def flop_texture(hand_range, board, store=None):
+    """
+    Répartition (mains faites, tirages, total) d'un range sur un board, via le cache des
+    solutions : un board équivalent par couleur est servi sans recalcul.
+
+    Returns:
+        np.ndarray: Vecteur float32 : 13 catégories de mains faites, 5 tirages, puis le total de combos.
+    """
+    from board_analysis import DRAW_NAMES, MADE_HAND_NAMES, range_texture
+    from solution_store import default_store
+
+    def compute(canonical, ranges):
+        texture = range_texture(ranges[0], canonical)
+        vector = np.array(
+            [texture["mains"][name] for name in MADE_HAND_NAMES]
+            + [texture["tirages"][name] for name in DRAW_NAMES]
+            + [texture["total"]],
+            dtype=np.float32,
+        )
+        return {"texture": vector}
+
+    store = store or default_store()
+    return store.get_or_compute("texture", compute, board=board, ranges=[hand_range])["texture"]
+
+
+def strategic_flop_sweep(hand_range):
+    """
+    Équivalent de `board_analysis.sweep_flops` sur les 1 755 flops stratégiques, pondérés par
+    leur nombre d'isomorphes. Valable pour un range symétrique par couleur (fréquences par case),
+    ce qui est le cas des ranges de la grille.
+
+    Returns:
+        tuple: (flops (1755, 3), poids (1755,), combos par main faite, combos par tirage, combos restants).
+    """
+    from board_analysis import sweep_flops
+
+    flops, counts = strategic_flops()
+    _, made_combos, draw_combos, totals = sweep_flops(hand_range, flops)
+    return flops, counts, made_combos, draw_combos, totals
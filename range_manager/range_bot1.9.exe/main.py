@@ -1,7 +1,5 @@
 import sys
 import os
-import shutil
-import sqlite3
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPixmap, QMovie
 from PyQt5.QtWidgets import (
@@ -9,6 +7,8 @@ from PyQt5.QtWidgets import (
 )
 from gui_range import RangeSelector
 import config  # Importer le module pour la variable globale
+from db_connection import get_connection
+from db_backup import BackupWorker
 import logging
 
 # Set up logging
@@ -148,8 +148,7 @@ class SplashScreen(QWidget):
     def create_new_db(self):
         """Crée une nouvelle base de données vierge."""
         db_path = os.path.join(self.nemesia_folder, "poker_bot.db")
-        conn = sqlite3.connect(db_path)
-        conn.close()
+        get_connection(db_path)  # Crée le fichier et le passe en mode WAL
         logging.info(f"Base de données créée : {db_path}")
         config.DB_PATH = db_path  # Met à jour la variable globale
         self.show_main_window()
@@ -162,14 +161,31 @@ class SplashScreen(QWidget):
 
         if selected_path:
             new_path = os.path.join(self.nemesia_folder, "poker_bot.db")
-            shutil.copy(selected_path, new_path)
-            logging.info(f"Base de données déplacée et renommée : {new_path}")
-            config.DB_PATH = new_path  # Met à jour la variable globale
-            self.show_main_window()
+            # Copie en ligne et en arrière-plan : le splash screen reste fluide pour les grosses bases
+            self.search_label.setText("Import de la base de données...")
+            self.import_worker = BackupWorker(selected_path, new_path, parent=self)
+            self.import_worker.progress.connect(self.show_import_progress)
+            self.import_worker.completed.connect(self.on_db_imported)
+            self.import_worker.failed.connect(self.on_db_import_failed)
+            self.import_worker.start()
         else:
             logging.warning("Aucun fichier sélectionné. Fermeture de l'application.")
             self.close_application()
 
+    def show_import_progress(self, copied, total):
+        if total:
+            self.search_label.setText(f"Import de la base de données... {copied / total:.0%}")
+
+    def on_db_imported(self, new_path):
+        logging.info(f"Base de données importée : {new_path}")
+        config.DB_PATH = new_path  # Met à jour la variable globale
+        self.show_main_window()
+
+    def on_db_import_failed(self, error):
+        logging.error(f"Échec de l'import de la base de données : {error}")
+        QMessageBox.critical(self, "Import impossible", f"La base de données n'a pas pu être importée :\n{error}")
+        self.close_application()
+
     def show_main_window(self):
         """Affiche la fenêtre principale avec le chemin de la base de données."""
         logging.debug("Affichage de la fenêtre principale.")
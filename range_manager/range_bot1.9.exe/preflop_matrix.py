@@ -0,0 +1,116 @@
+# preflop_matrix.py
+
+import os
+import time
+
+import numpy as np
+
+import config
+from range_calculator import Range, GRID_SIZE
+
+# Incrémenter la version à chaque changement de format ou de méthode de calcul
+MATRIX_VERSION = 1
+MATRIX_FILENAME = f"preflop_equity_v{MATRIX_VERSION}.npy"
+DEFAULT_ITERATIONS_PER_CELL = 5_000
+
+# Matrices déjà ouvertes, par chemin (seules les ouvertures réussies sont conservées)
+_open_matrices = {}
+
+
+def matrix_path():
+    """Chemin du fichier de la matrice, à côté de la base de données."""
+    if config.DB_PATH:
+        folder = os.path.dirname(config.DB_PATH)
+    else:
+        folder = os.path.join(os.path.expanduser("~/Documents"), "Némésia Poker Suite")
+    return os.path.join(folder, MATRIX_FILENAME)
+
+
+def generate_matrix(path=None, iterations_per_cell=DEFAULT_ITERATIONS_PER_CELL, workers=None, seed=None):
+    """
+    Calcule (une seule fois) la matrice 169x169 des équités classe contre classe et l'enregistre.
+
+    Le fichier contient un tableau float32 (2, 169, 169) : [0] les équités, [1] le nombre
+    de paires de combinaisons compatibles de chaque confrontation.
+    """
+    from equity import matchup_grid
+
+    path = path or matrix_path()
+    equities, counts = matchup_grid(iterations_per_cell=iterations_per_cell, workers=workers, seed=seed)
+    data = np.stack([equities, counts.astype(np.float32)])
+
+    # Écriture atomique : un lecteur ne voit jamais un fichier partiel
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        np.save(file, data)
+    os.replace(temp_path, path)
+    _open_matrices.pop(path, None)  # La prochaine lecture ouvre le nouveau fichier
+    return path
+
+
+def load_matrix(path=None):
+    """
+    Ouvre la matrice en lecture seule par projection mémoire (quelques millisecondes, pages
+    chargées à la demande), une seule fois par fichier.
+
+    Le chemin est recalculé à chaque appel (`config.DB_PATH` peut changer) et un fichier
+    absent n'est pas mémorisé : une matrice générée entre-temps est utilisée dès l'appel suivant.
+
+    Returns:
+        tuple | None: (équités (169, 169), paires compatibles (169, 169)), ou None si le fichier n'existe pas.
+    """
+    path = path or matrix_path()
+    matrix = _open_matrices.get(path)
+    if matrix is None and os.path.exists(path):
+        data = np.load(path, mmap_mode="r")
+        matrix = _open_matrices[path] = (data[0], data[1])
+    return matrix
+
+
+def preflop_equity(hero, villain, matrix=None):
+    """
+    Équité préflop du range `hero` contre `villain` par produit matriciel pondéré :
+    somme(f_i * f_j * N_ij * E_ij) / somme(f_i * f_j * N_ij), où f sont les fréquences des cases.
+
+    Returns:
+        float | None: Équité (0 à 1), ou None si la matrice n'a pas été générée.
+    """
+    matrix = matrix or load_matrix()
+    if matrix is None:
+        return None
+    equities, counts = matrix
+    hero_frequencies = Range.from_hands(hero).class_frequencies
+    villain_frequencies = Range.from_hands(villain).class_frequencies
+    total = hero_frequencies @ counts @ villain_frequencies
+    if not total:
+        return float("nan")
+    return float(hero_frequencies @ (counts * equities) @ villain_frequencies / total)
+
+
+def preflop_equity_grid(hero, villain, matrix=None):
+    """
+    Équité préflop de chaque case du héros contre le range adverse.
+
+    Returns:
+        np.ndarray | None: Tableau (13, 13), NaN pour les cases absentes ; None sans matrice.
+    """
+    matrix = matrix or load_matrix()
+    if matrix is None:
+        return None
+    equities, counts = matrix
+    hero_frequencies = Range.from_hands(hero).class_frequencies
+    villain_frequencies = Range.from_hands(villain).class_frequencies
+    totals = counts @ villain_frequencies
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grid = np.where(
+            (hero_frequencies > 0) & (totals > 0),
+            (counts * equities) @ villain_frequencies / totals,
+            np.nan,
+        )
+    return grid.reshape(GRID_SIZE, GRID_SIZE)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    output = generate_matrix()
+    print(f"Matrice préflop écrite dans {output} en {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,166 @@
+# push_fold.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from database_range import create_table, save_range
+from preflop_matrix import load_matrix, matrix_path
+from range_calculator import Range
+
+# Mêmes positions que `RangeSelector.positions` (ordre de parole préflop)
+POSITIONS = ["UTG", "UTG+1", "UTG+2", "LJ", "HJ", "CO", "BTN", "SB", "BB"]
+BLINDS = {"SB": 0.5, "BB": 1.0}
+DEFAULT_ITERATIONS = 1_000
+CHART_DEPTHS = range(1, 26)
+
+
+def push_type(stack):
+    return f"Push {stack:g}bb"
+
+
+def call_type(pusher, stack):
+    return f"Call {pusher} {stack:g}bb"
+
+
+def _worker_count(workers):
+    if workers is None:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _load_tables(path=None):
+    matrix = load_matrix(path)
+    if matrix is None:
+        raise RuntimeError(
+            f"Matrice préflop introuvable ({path or matrix_path()}) : lancez preflop_matrix.py pour la générer."
+        )
+    equities, counts = (np.asarray(array, dtype=np.float64) for array in matrix)
+    equities = np.nan_to_num(equities, nan=0.5)
+    # Les lignes de `counts` donnent le poids de chaque classe adverse compatible avec la main
+    return counts * equities, counts, counts.sum(axis=1)
+
+
+def _contributions(positions, ante):
+    return np.array([BLINDS.get(position, 0.0) + ante for position in positions])
+
+
+def solve_push_fold(stack, positions=POSITIONS, ante=0.0, iterations=DEFAULT_ITERATIONS, path=None):
+    """
+    Équilibre push/fold à tapis effectif `stack` (en grosses blindes) par fictitious play.
+
+    Modèle : chaque position, premier joueur à parler, fait tapis ou se couche ; les joueurs
+    suivants suivent ou se couchent, le premier qui suit joue à tapis en tête-à-tête. À chaque
+    itération, chaque joueur joue sa meilleure réponse (vecteur de 169 décisions) contre la
+    stratégie moyenne des autres, puis la moyenne est mise à jour. Les EV sont calculées
+    par produits matrice-vecteur sur la matrice préflop (équités et paires de combos compatibles).
+
+    Args:
+        stack (float): Tapis effectif en grosses blindes (blindes et ante comprises).
+        ante (float): Ante par joueur, en grosses blindes.
+
+    Returns:
+        dict: {"push": {pusher: fréquences (169,)}, "call": {(pusher, caller): fréquences (169,)},
+               "ev": {pusher: EV du tapis par classe en bb}}.
+    """
+    weighted_equities, counts, totals = _load_tables(path)
+    players = len(positions)
+    pushers = players - 1  # Le dernier à parler (BB) ne fait jamais tapis en premier
+    contributions = _contributions(positions, ante)
+    dead_money = contributions.sum()
+
+    # Confrontations possibles : pusher p (lignes) contre suiveur c > p (colonnes)
+    valid = np.arange(players)[None, :] > np.arange(pushers)[:, None]
+    # Pot d'un tapis suivi : deux tapis engagés plus l'argent mort des autres joueurs
+    pots = 2 * stack + dead_money - contributions[:pushers, None] - contributions[None, :]
+
+    push = np.full((pushers, len(totals)), 0.5)
+    call = np.where(valid[..., None], 0.5, 0.0) * np.ones(len(totals))
+
+    def push_ev():
+        called = call @ counts.T
+        won = call @ weighted_equities.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            equity = np.where(called > 0, won / called, 0.5)
+        call_probability = called / totals
+        # Probabilité que tous les joueurs entre le pusher et c se soient couchés
+        folds = np.cumprod(1 - call_probability, axis=1)
+        reach = np.concatenate([np.ones_like(folds[:, :1]), folds[:, :-1]], axis=1)
+        showdown = equity * pots[..., None] - stack + contributions[:pushers, None, None]
+        return (reach * call_probability * showdown).sum(axis=1) + folds[:, -1] * dead_money
+
+    def call_ev():
+        pushed = push @ counts.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            equity = np.where(pushed > 0, (push @ weighted_equities.T) / pushed, 0.5)
+        return equity[:, None, :] * pots[..., None] - stack + contributions[None, :, None]
+
+    for iteration in range(1, iterations + 1):
+        push_response = push_ev() > 0
+        call_response = (call_ev() > 0) & valid[..., None]
+        step = 1.0 / (iteration + 1)
+        push += (push_response - push) * step
+        call += (call_response - call) * step
+
+    def clean(frequencies):
+        # Les moyennes de fictitious play convergent lentement vers 0 ou 1 hors des mains frontières
+        return np.where(frequencies < 0.02, 0.0, np.where(frequencies > 0.98, 1.0, frequencies))
+
+    evs = push_ev()
+    return {
+        "push": {positions[p]: clean(push[p]) for p in range(pushers)},
+        "call": {
+            (positions[p], positions[c]): clean(call[p, c])
+            for p in range(pushers) for c in range(p + 1, players)
+        },
+        "ev": {positions[p]: evs[p] for p in range(pushers)},
+    }
+
+
+def save_chart(stack, solution):
+    """Enregistre les ranges d'une solution via `save_range` ("Push 10bb", "Call BTN 10bb", ...)."""
+    for pusher, frequencies in solution["push"].items():
+        save_range(pusher, push_type(stack), Range.from_class_weights(frequencies))
+    for (pusher, caller), frequencies in solution["call"].items():
+        save_range(caller, call_type(pusher, stack), Range.from_class_weights(frequencies))
+
+
+def _solve_worker(stack, positions, ante, iterations, path):
+    solution = solve_push_fold(stack, positions, ante, iterations, path)
+    solution.pop("ev")
+    return stack, solution
+
+
+def generate_charts(stacks=CHART_DEPTHS, positions=POSITIONS, ante=0.0, iterations=DEFAULT_ITERATIONS,
+                    workers=None, save=True, path=None):
+    """
+    Calcule les charts push/fold pour chaque profondeur de `stacks`, une profondeur par
+    processus (ProcessPoolExecutor), puis les enregistre depuis le processus principal.
+
+    Returns:
+        dict: {profondeur: solution} (voir `solve_push_fold`).
+    """
+    stacks = list(stacks)
+    workers = min(_worker_count(workers), len(stacks))
+    arguments = [(stack, positions, ante, iterations, path) for stack in stacks]
+    if workers == 1:
+        results = [_solve_worker(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve_worker, *zip(*arguments)))
+
+    if save:
+        create_table()
+        for stack, solution in results:
+            save_chart(stack, solution)
+    return dict(results)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    charts = generate_charts(save=False)
+    print(f"{len(charts)} charts push/fold calculés en {time.perf_counter() - start:.1f} s")
+    for position, frequencies in charts[10]["push"].items():
+        print(f"{position:>6} push 10bb : {Range.from_class_weights(frequencies).percentage:.1f}%")
@@ -1,59 +1,398 @@
 # range_calculator.py
 
+import numpy as np
+
 from range_data import RANGES
 
 TOTAL_COMBINATIONS = 1326
 
+# Rangs dans l'ordre des cartes (2 = 0 ... A = 12) et dans l'ordre de la grille (A en haut à gauche)
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+GRID_RANKS = "AKQJT98765432"
+GRID_SIZE = len(GRID_RANKS)
+NUM_CLASSES = GRID_SIZE * GRID_SIZE  # 169 classes de mains
+MASK_BYTES = (NUM_CLASSES + 7) // 8  # Masque 169 bits sérialisé sur 22 octets
+
+
+def _build_hand_classes():
+    """Construit les 169 noms de mains dans l'ordre de la grille 13x13 (index = ligne * 13 + colonne)."""
+    classes = []
+    for i, rank1 in enumerate(GRID_RANKS):
+        for j, rank2 in enumerate(GRID_RANKS):
+            if i == j:
+                classes.append(f"{rank1}{rank2}")  # Paires
+            elif i < j:
+                classes.append(f"{rank1}{rank2}s")  # Suited
+            else:
+                classes.append(f"{rank2}{rank1}o")  # Offsuit
+    return classes
+
+
+def _build_combos():
+    """Énumère les 1326 combinaisons (carte1 < carte2) et la classe de main de chacune."""
+    cards = []
+    classes = []
+    for card1 in range(52):
+        for card2 in range(card1 + 1, 52):
+            rank1, rank2 = card1 // 4, card2 // 4  # rank1 <= rank2
+            row_high, row_low = 12 - rank2, 12 - rank1
+            if rank1 == rank2:
+                class_index = row_high * GRID_SIZE + row_high
+            elif card1 % 4 == card2 % 4:
+                class_index = row_high * GRID_SIZE + row_low
+            else:
+                class_index = row_low * GRID_SIZE + row_high
+            cards.append((card1, card2))
+            classes.append(class_index)
+    return np.array(cards, dtype=np.int8), np.array(classes, dtype=np.int16)
+
+
+HAND_CLASSES = _build_hand_classes()
+CLASS_INDEX = {hand: index for index, hand in enumerate(HAND_CLASSES)}
+
+# Poids (nombre de combinaisons) de chaque classe : 6 paires, 4 suited, 12 offsuit
+CLASS_WEIGHTS = np.array(
+    [6 if len(hand) == 2 else 4 if hand.endswith("s") else 12 for hand in HAND_CLASSES],
+    dtype=np.int16,
+)
+
+# Combinaisons : cartes (index 0-51 = rang * 4 + couleur) et classe de main associée
+COMBO_CARDS, COMBO_CLASS = _build_combos()
+# Masque 52 bits des deux cartes de chaque combinaison (retrait de cartes par simple ET binaire)
+COMBO_CARD_MASKS = np.bitwise_or.reduce(np.left_shift(1, COMBO_CARDS.astype(np.int64)), axis=1)
+
+# Masques 169 bits par catégorie, pour compter les combinaisons avec de simples popcounts
+PAIR_MASK = sum(1 << i for i, hand in enumerate(HAND_CLASSES) if len(hand) == 2)
+SUITED_MASK = sum(1 << i for i, hand in enumerate(HAND_CLASSES) if hand.endswith("s"))
+OFFSUIT_MASK = sum(1 << i for i, hand in enumerate(HAND_CLASSES) if hand.endswith("o"))
+FULL_MASK = (1 << NUM_CLASSES) - 1
+
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+class Range:
+    """
+    Range de mains stocké sous forme de masque 169 bits (un bit par case de la grille).
+
+    Un range "pur" (chaque main jouée à 100 %) n'utilise que le masque : les opérations
+    ensemblistes (|, &, -) et le comptage des combinaisons sont de simples opérations
+    sur entiers. Un range à fréquences mixtes (ex: AQo 3-bet à 40 %) porte en plus un
+    vecteur de 1326 poids de combinaisons ; les mêmes opérations deviennent alors des
+    opérations NumPy vectorisées (somme / produit scalaire, min, max).
+    """
+
+    __slots__ = ("mask", "_weights")
+
+    def __init__(self, hands=()):
+        self.mask = 0
+        self._weights = None
+        for hand in hands:
+            if hand:  # Ignore les entrées vides des anciennes sauvegardes ("".split(","))
+                self.add(hand)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Crée un range à partir d'un masque 169 bits."""
+        hand_range = cls()
+        hand_range.mask = int(mask) & FULL_MASK
+        return hand_range
+
+    @classmethod
+    def from_hands(cls, hands):
+        """Crée un range à partir d'une liste de mains (format texte historique)."""
+        if isinstance(hands, Range):
+            return hands.copy()
+        return cls(hands)
+
+    @classmethod
+    def from_weights(cls, weights):
+        """Crée un range à partir d'un vecteur de 1326 fréquences de combinaisons (0 à 1)."""
+        # Quantifié en float16 : un range relu depuis la base est identique à l'original
+        weights = np.clip(np.asarray(weights, dtype=np.float16), 0.0, 1.0).astype(np.float32)
+        if weights.shape != (TOTAL_COMBINATIONS,):
+            raise ValueError(f"Vecteur de poids invalide : {weights.shape}, attendu ({TOTAL_COMBINATIONS},)")
+        hand_range = cls()
+        hand_range._weights = weights
+        hand_range._settle()
+        return hand_range
+
+    @classmethod
+    def from_class_weights(cls, class_weights):
+        """Crée un range à partir de 169 fréquences de classes (ordre de la grille)."""
+        class_weights = np.asarray(class_weights, dtype=np.float32)
+        if class_weights.shape != (NUM_CLASSES,):
+            raise ValueError(f"Vecteur de poids invalide : {class_weights.shape}, attendu ({NUM_CLASSES},)")
+        return cls.from_weights(class_weights[COMBO_CLASS])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Reconstruit un range depuis son BLOB SQLite (1326 float16)."""
+        return cls.from_weights(np.frombuffer(data, dtype=np.float16))
+
+    def to_bytes(self):
+        """Sérialise le range en BLOB compact (1326 float16, 2652 octets)."""
+        return self.weights.astype(np.float16).tobytes()
+
+    @classmethod
+    def from_mask_bytes(cls, data):
+        """Reconstruit un range pur depuis son masque sérialisé (22 octets)."""
+        return cls.from_mask(int.from_bytes(data, "little"))
+
+    def to_mask_bytes(self):
+        """Sérialise le masque 169 bits (22 octets, petit-boutiste)."""
+        return self.mask.to_bytes(MASK_BYTES, "little")
+
+    def to_hands(self):
+        """Retourne la liste des mains, dans l'ordre de la grille (format texte historique)."""
+        return list(self)
+
+    def copy(self):
+        hand_range = Range.from_mask(self.mask)
+        if self._weights is not None:
+            hand_range._weights = self._weights.copy()
+        return hand_range
+
+    def _settle(self):
+        """Recalcule le masque depuis les poids et repasse en range pur si possible."""
+        classes = np.bincount(COMBO_CLASS, weights=self._weights, minlength=NUM_CLASSES) > 0
+        packed = np.packbits(classes, bitorder="little")
+        self.mask = int.from_bytes(packed.tobytes(), "little")
+        if np.array_equal(self._weights, classes[COMBO_CLASS]):
+            self._weights = None
+
+    def add(self, hand):
+        """Ajoute une main (ex: "AKs") au range, à 100 %."""
+        self.set_frequency(hand, 1.0)
+
+    def discard(self, hand):
+        """Retire une main du range si elle est présente."""
+        if hand in CLASS_INDEX:
+            self.set_frequency(hand, 0.0)
+
+    def set_frequency(self, hand, frequency):
+        """Fixe la fréquence (0 à 1) de toutes les combinaisons d'une main."""
+        try:
+            index = CLASS_INDEX[hand]
+        except KeyError:
+            raise ValueError(f"Main inconnue : {hand!r}") from None
+        frequency = float(np.float16(min(max(float(frequency), 0.0), 1.0)))
+
+        if self._weights is None and frequency in (0.0, 1.0):
+            if frequency:
+                self.mask |= 1 << index
+            else:
+                self.mask &= ~(1 << index)
+            return
+
+        self._weights = self.weights
+        self._weights[COMBO_CLASS == index] = frequency
+        self._settle()
+
+    @property
+    def is_weighted(self):
+        """Indique si le range contient des fréquences mixtes."""
+        return self._weights is not None
+
+    @property
+    def weights(self):
+        """Vecteur (1326,) float32 des fréquences de chaque combinaison (copie pour un range pur)."""
+        if self._weights is None:
+            return self.combos.astype(np.float32)
+        return self._weights
+
+    @property
+    def class_frequencies(self):
+        """Fréquence moyenne (169,) de chaque case de la grille."""
+        if self._weights is None:
+            return self.classes.astype(np.float32)
+        return np.bincount(COMBO_CLASS, weights=self._weights, minlength=NUM_CLASSES) / CLASS_WEIGHTS
+
+    def frequency(self, hand):
+        """Fréquence moyenne d'une main (0 si absente)."""
+        return float(self.class_frequencies[CLASS_INDEX[hand]])
+
+    @property
+    def combinations(self):
+        """Nombre total de combinaisons du range (pondéré par les fréquences)."""
+        if self._weights is not None:
+            return float(self._weights.sum(dtype=np.float64))
+        mask = self.mask
+        return (
+            6 * _popcount(mask & PAIR_MASK)
+            + 4 * _popcount(mask & SUITED_MASK)
+            + 12 * _popcount(mask & OFFSUIT_MASK)
+        )
+
+    @property
+    def percentage(self):
+        """Pourcentage des 1326 combinaisons couvert par le range."""
+        return (self.combinations / TOTAL_COMBINATIONS) * 100
+
+    @property
+    def classes(self):
+        """Tableau booléen (169,) indiquant les classes présentes, dans l'ordre de la grille."""
+        packed = np.frombuffer(self.mask.to_bytes(MASK_BYTES, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder="little")[:NUM_CLASSES].astype(bool)
+
+    @property
+    def combos(self):
+        """Tableau booléen (1326,) indiquant les combinaisons présentes."""
+        if self._weights is not None:
+            return self._weights > 0
+        return self.classes[COMBO_CLASS]
+
+    def overlap(self, other):
+        """Nombre de combinaisons communes pondérées (produit scalaire des vecteurs de poids)."""
+        other = Range.from_hands(other)
+        if self._weights is None and other._weights is None:
+            return (self & other).combinations
+        return float(self.weights @ other.weights)
+
+    def __contains__(self, hand):
+        index = CLASS_INDEX.get(hand)
+        return index is not None and bool(self.mask >> index & 1)
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low_bit = mask & -mask
+            yield HAND_CLASSES[low_bit.bit_length() - 1]
+            mask ^= low_bit
+
+    def __len__(self):
+        return _popcount(self.mask)
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __eq__(self, other):
+        if isinstance(other, Range):
+            if self._weights is None and other._weights is None:
+                return self.mask == other.mask
+            return np.array_equal(self.weights, other.weights)
+        return NotImplemented
+
+    __hash__ = None
+
+    def _combine(self, other, mask_operation, weight_operation):
+        other = Range.from_hands(other)
+        if self._weights is None and other._weights is None:
+            return Range.from_mask(mask_operation(self.mask, other.mask))
+        return Range.from_weights(weight_operation(self.weights, other.weights))
+
+    def __or__(self, other):
+        return self._combine(other, lambda a, b: a | b, np.maximum)
+
+    def __and__(self, other):
+        return self._combine(other, lambda a, b: a & b, np.minimum)
+
+    def __sub__(self, other):
+        return self._combine(other, lambda a, b: a & ~b, lambda a, b: a - b)
+
+    def __repr__(self):
+        if self._weights is not None:
+            frequencies = self.class_frequencies
+            return "Range({%s})" % ", ".join(
+                f"{HAND_CLASSES[i]!r}: {frequencies[i]:.2f}" for i in np.flatnonzero(frequencies)
+            )
+        return f"Range({self.to_hands()!r})"
+
 
 def calculate_combinations(hands):
     """Calcule le nombre total de combinaisons pour un ensemble de mains."""
-    total = 0
-    for hand in hands:
-        if len(hand) == 2:  # Paires
-            total += 6
-        elif hand.endswith("s"):  # Suited
-            total += 4
-        else:  # Offsuit
-            total += 12
-    return total
+    return Range.from_hands(hands).combinations
 
 
 def calculate_percentage(hands):
     """Calcule le pourcentage des mains jouées."""
-    total_combinations = calculate_combinations(hands)
-    return (total_combinations / TOTAL_COMBINATIONS) * 100
+    return Range.from_hands(hands).percentage
+
+
+def _build_hand_order():
+    """
+    Ordre total des 169 classes : d'abord la bande du premier ancrage de `RANGES` qui
+    contient la main, puis, dans une même bande, la carte haute, la carte basse et
+    paire > suited > offsuit. Les ancrages étant imbriqués, chaque ancrage est un préfixe.
+    """
+    first_anchor = {}
+    for percentage in sorted(RANGES):
+        for hand in RANGES[percentage]:
+            first_anchor.setdefault(hand, percentage)
 
+    def sort_key(index):
+        hand = HAND_CLASSES[index]
+        kind = 0 if len(hand) == 2 else 1 if hand.endswith("s") else 2
+        return (
+            first_anchor.get(hand, float("inf")),
+            -RANKS.index(hand[0]),
+            -RANKS.index(hand[1]),
+            kind,
+        )
 
-def interpolate_ranges(lower_percentage, upper_percentage, target_percentage):
-    """Interpole les mains entre deux pourcentages connus pour atteindre un pourcentage cible."""
-    lower_hands = set(RANGES[lower_percentage])
-    upper_hands = set(RANGES[upper_percentage])
+    return np.array(sorted(range(NUM_CLASSES), key=sort_key), dtype=np.int16)
 
-    # Mains supplémentaires nécessaires pour interpoler
-    total_combinations_lower = calculate_combinations(lower_hands)
-    total_combinations_target = int((target_percentage / 100) * TOTAL_COMBINATIONS)
 
-    additional_combinations_needed = total_combinations_target - total_combinations_lower
+def _build_prefix_masks(order):
+    """Masque 169 bits de chaque préfixe de l'ordre des mains (de 0 à 169 mains)."""
+    masks = [0]
+    for index in order:
+        masks.append(masks[-1] | 1 << int(index))
+    return masks
 
-    # Ajouter des mains du range supérieur jusqu'à atteindre le nombre nécessaire de combinaisons
-    additional_hands = []
-    for hand in upper_hands - lower_hands:
-        weight = 6 if len(hand) == 2 else 4 if hand.endswith("s") else 12
-        if calculate_combinations(lower_hands | set(additional_hands)) + weight > total_combinations_target:
-            break
-        additional_hands.append(hand)
 
-    return lower_hands | set(additional_hands)
+def _check_anchors():
+    """
+    Vérifie que chaque ancrage de `RANGES` est exactement un préfixe de `HAND_ORDER`, et que
+    `get_hands_for_percentage` ne retire jamais de main quand le pourcentage augmente
+    (de 0 à 100 % par pas de 0,1 %).
+    """
+    for percentage, hands in RANGES.items():
+        if Range.from_mask(PREFIX_MASKS[len(hands)]) != Range.from_hands(hands):
+            raise ValueError(f"Le range de référence {percentage}% n'est pas un préfixe de l'ordre des mains.")
+        if get_hands_for_percentage(percentage) != Range.from_hands(hands):
+            raise ValueError(f"Le pourcentage {percentage}% ne retourne pas son range de référence.")
+    counts = [_prefix_length(step / 10) for step in range(1001)]
+    if any(later < earlier for earlier, later in zip(counts, counts[1:])):
+        raise ValueError("Le nombre de mains diminue quand le pourcentage augmente.")
+
+
+# Ordre des mains, combinaisons cumulées (CUMULATIVE_COMBINATIONS[k] = combos des k premières mains)
+# et masque de chaque préfixe : un pourcentage se traduit par une recherche dichotomique.
+HAND_ORDER = _build_hand_order()
+CUMULATIVE_COMBINATIONS = np.concatenate(([0], np.cumsum(CLASS_WEIGHTS[HAND_ORDER], dtype=np.int32)))
+PREFIX_MASKS = _build_prefix_masks(HAND_ORDER)
+
+# Points d'appui pourcentage -> combinaisons : 0 % et chaque ancrage de `RANGES` (son nombre exact de combos)
+ANCHOR_PERCENTAGES = np.array([0.0] + [float(p) for p in sorted(RANGES) if p > 0])
+ANCHOR_COMBINATIONS = np.array(
+    [0.0] + [float(CUMULATIVE_COMBINATIONS[len(RANGES[p])]) for p in sorted(RANGES) if p > 0]
+)
+
+
+def _prefix_length(percentage):
+    """
+    Nombre de mains du préfixe de `HAND_ORDER` retenu pour `percentage`.
+
+    Le nombre de combinaisons visé est interpolé linéairement entre les ancrages voisins
+    (un ancrage vise exactement les combos de son range), puis arrondi au plus long préfixe
+    qui ne le dépasse pas : la fonction est croissante et chaque ancrage retombe sur son range.
+    """
+    target_combinations = round(float(np.interp(percentage, ANCHOR_PERCENTAGES, ANCHOR_COMBINATIONS)), 6)
+    return int(np.searchsorted(CUMULATIVE_COMBINATIONS, target_combinations, side="right")) - 1
 
 
 def get_hands_for_percentage(percentage):
-    """Retourne les mains correspondant au pourcentage donné."""
-    if percentage in RANGES:
-        return set(RANGES[percentage])
+    """
+    Retourne le range (objet `Range`) correspondant au pourcentage donné.
+
+    Un pourcentage de `RANGES` retourne exactement son range de référence ; entre deux
+    ancrages, le range grandit progressivement de l'un à l'autre. Le résultat est
+    déterministe et un pourcentage plus grand ne retire jamais de main.
+    """
+    return Range.from_mask(PREFIX_MASKS[_prefix_length(percentage)])
 
-    # Déterminer les bornes connues pour interpolation
-    lower_bound = max(p for p in RANGES if p < percentage)
-    upper_bound = min(p for p in RANGES if p > percentage)
 
-    # Interpoler les mains entre les bornes
-    return interpolate_ranges(lower_bound, upper_bound, percentage)
+_check_anchors()
@@ -0,0 +1,158 @@
+# range_pack.py
+
+import base64
+import json
+import sqlite3
+import time
+
+import config
+from database_range import UPSERT_RANGE, create_table, range_columns
+from db_connection import execute, transaction
+from range_calculator import MASK_BYTES, Range, TOTAL_COMBINATIONS
+
+PACK_FORMAT = "nemesia-ranges"
+PACK_VERSION = 1
+
+
+def _encode_row(position, range_type, mask, weights):
+    """Ligne JSON d'un range : masque 169 bits en hexadécimal, fréquences float16 en base64 si mixtes."""
+    row = {"position": position, "range_type": range_type, "mask": mask.hex()}
+    if weights is not None:
+        row["weights"] = base64.b64encode(weights).decode("ascii")
+    return json.dumps(row, ensure_ascii=False)
+
+
+def _decode_row(line, line_number):
+    """
+    Colonnes (position, range_type, mask, weights) d'une ligne du pack.
+    Lève ValueError si la ligne est invalide (l'import est alors annulé).
+    """
+    try:
+        row = json.loads(line)
+        position, range_type = row["position"], row["range_type"]
+        if not isinstance(position, str) or not isinstance(range_type, str):
+            raise ValueError("position et range_type doivent être des chaînes")
+        if "weights" in row:
+            weights = base64.b64decode(row["weights"], validate=True)
+            if len(weights) != TOTAL_COMBINATIONS * 2:
+                raise ValueError(f"{len(weights)} octets de fréquences, {TOTAL_COMBINATIONS * 2} attendus")
+            hand_range = Range.from_bytes(weights)
+        elif "mask" in row:
+            mask = bytes.fromhex(row["mask"])
+            if len(mask) != MASK_BYTES:
+                raise ValueError(f"masque de {len(mask)} octets, {MASK_BYTES} attendus")
+            hand_range = Range.from_mask_bytes(mask)
+        else:
+            # Pack écrit à la main : liste de mains ("AA", "AKs"...)
+            hand_range = Range(row["hands"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Ligne {line_number} invalide : {e}") from None
+    # Réencodé depuis le range : masque et fréquences toujours cohérents en base
+    return (position, range_type, *range_columns(hand_range))
+
+
+def _read_rows(file):
+    """Lit un pack ligne par ligne (sans le charger entièrement en mémoire)."""
+    header = json.loads(file.readline() or "{}")
+    if not isinstance(header, dict) or header.get("format") != PACK_FORMAT:
+        raise ValueError("Fichier non reconnu : en-tête de pack de ranges manquant.")
+    if not isinstance(header.get("version", 0), int) or header.get("version", 0) > PACK_VERSION:
+        raise ValueError(f"Version de pack {header['version']} non prise en charge.")
+    for line_number, line in enumerate(file, start=2):
+        if line.strip():
+            yield _decode_row(line, line_number)
+
+
+def export_pack(path, range_types=None):
+    """
+    Exporte les ranges de la base dans un pack JSON-lines (une ligne d'en-tête, puis un range par ligne).
+
+    Args:
+        path (str): Fichier de destination.
+        range_types (list): Types à exporter (tous si None).
+
+    Returns:
+        int: Nombre de ranges exportés.
+    """
+    query = "SELECT position, range_type, mask, weights FROM ranges"
+    parameters = ()
+    if range_types is not None:
+        range_types = list(range_types)
+        query += f" WHERE range_type IN ({', '.join('?' * len(range_types))})"
+        parameters = range_types
+    count = 0
+    try:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"format": PACK_FORMAT, "version": PACK_VERSION}) + "\n")
+            for row in execute(config.DB_PATH, query + " ORDER BY range_type, position", parameters):
+                file.write(_encode_row(*row) + "\n")
+                count += 1
+        print(f"{count} ranges exportés vers {path}.")
+    except (sqlite3.Error, OSError) as e:
+        print(f"Erreur lors de l'export des ranges : {e}")
+    return count
+
+
+def import_pack(path, replace=False):
+    """
+    Importe un pack de ranges : lecture en flux, écriture par `executemany` dans une seule
+    transaction. Une ligne invalide annule tout l'import (la base reste inchangée).
+
+    Args:
+        path (str): Pack JSON-lines produit par `export_pack`.
+        replace (bool): Supprime d'abord tous les ranges existants.
+
+    Returns:
+        int: Nombre de ranges importés (0 si l'import a été annulé).
+    """
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    try:
+        with open(path, encoding="utf-8") as file, transaction(config.DB_PATH) as conn:
+            if replace:
+                conn.execute("DELETE FROM ranges")
+            conn.executemany(UPSERT_RANGE, counted(_read_rows(file)))
+        print(f"{count} ranges importés depuis {path}.")
+        return count
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Import annulé, aucun range modifié : {e}")
+        return 0
+
+
+def benchmark(ranges=1_000):
+    """Mesure l'export puis l'import d'un pack de `ranges` ranges dans une base temporaire."""
+    import os
+    import tempfile
+
+    import numpy as np
+
+    folder = tempfile.mkdtemp()
+    config.DB_PATH = os.path.join(folder, "poker_bot.db")
+    create_table()
+    rng = np.random.default_rng(0)
+    with transaction(config.DB_PATH) as conn:
+        conn.executemany(UPSERT_RANGE, [
+            (f"P{i % 9}", f"Type {i // 9}",
+             *range_columns(Range.from_class_weights(rng.random(169) * (rng.random(169) < 0.3))))
+            for i in range(ranges)
+        ])
+    path = os.path.join(folder, "pack.jsonl")
+
+    start = time.perf_counter()
+    export_pack(path)
+    exported = time.perf_counter() - start
+    start = time.perf_counter()
+    import_pack(path, replace=True)
+    imported = time.perf_counter() - start
+    print(f"Export : {exported * 1000:.0f} ms, import : {imported * 1000:.0f} ms "
+          f"({os.path.getsize(path) / 1024:.0f} Ko)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,180 @@
+# solution_store.py
+
+import hashlib
+import io
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from db_connection import execute, fetchone, transaction
+from isomorphism import board_to_text, canonical_spot, restore_combos
+
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # Taille maximale des résultats sur disque
+
+
+def spot_key(kind, board=(), ranges=(), **parameters):
+    """
+    Clé canonique d'un spot : empreinte du type de calcul, du board et des ranges ramenés à
+    leur représentant isomorphe, et des paramètres (tapis, tailles de mise, itérations...).
+
+    Returns:
+        tuple: (clé hexadécimale, board canonique, ranges canoniques, permutation appliquée).
+    """
+    canonical, canonical_ranges, permutation = canonical_spot(board, ranges)
+    description = json.dumps({
+        "kind": kind,
+        "board": board_to_text(canonical),
+        "ranges": [hashlib.sha1(hand_range.to_bytes()).hexdigest() for hand_range in canonical_ranges],
+        "parameters": parameters,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(description.encode()).hexdigest(), list(canonical), canonical_ranges, permutation
+
+
+def pack(arrays):
+    """Sérialise un dictionnaire de tableaux NumPy (npz compressé)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack(blob):
+    """Relit un dictionnaire de tableaux sérialisé par `pack`."""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+class SolutionStore:
+    """
+    Cache persistant des résultats (équités, solutions, textures) par spot canonique.
+
+    Un LRU en mémoire sert les spots récents sans accès disque ; la table `solutions` de
+    poker_bot.db garde les autres, bornée à `max_bytes` : les résultats les moins récemment
+    utilisés sont supprimés en premier.
+    """
+
+    def __init__(self, db_path=None, memory_entries=DEFAULT_MEMORY_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path or config.DB_PATH
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.create_table()
+
+    def create_table(self):
+        try:
+            with transaction(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS solutions (
+                        key TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        payload BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_solutions_last_used ON solutions (last_used)")
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la création de la table solutions : {e}")
+
+    def _remember(self, key, arrays):
+        self.memory[key] = arrays
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Résultat enregistré pour une clé (dictionnaire de tableaux), ou None."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        try:
+            row = fetchone(self.db_path, "SELECT payload FROM solutions WHERE key = ?", (key,))
+            if row is not None:
+                execute(self.db_path, "UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la lecture d'une solution : {e}")
+            return None
+        if row is None:
+            return None
+        arrays = unpack(row[0])
+        self._remember(key, arrays)
+        return arrays
+
+    def put(self, key, kind, arrays):
+        """Enregistre un résultat (dictionnaire de tableaux) en mémoire et sur disque."""
+        self._remember(key, arrays)
+        payload = pack(arrays)
+        try:
+            with transaction(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO solutions (key, kind, payload, size, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (key, kind, payload, len(payload), time.time()))
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'enregistrement d'une solution : {e}")
+
+    def _evict(self, conn):
+        """Supprime les résultats les moins récemment utilisés au-delà de `max_bytes`."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM solutions ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM solutions WHERE key = ?", removed)
+        for (key,) in removed:
+            self.memory.pop(key, None)
+
+    def clear(self, kind=None):
+        """Vide le cache (un seul type de calcul si `kind` est précisé)."""
+        self.memory.clear()
+        try:
+            if kind is None:
+                execute(self.db_path, "DELETE FROM solutions")
+            else:
+                execute(self.db_path, "DELETE FROM solutions WHERE kind = ?", (kind,))
+        except sqlite3.Error as e:
+            print(f"Erreur lors du nettoyage des solutions : {e}")
+
+    def get_or_compute(self, kind, compute, board=(), ranges=(), per_combo=(), **parameters):
+        """
+        Retourne le résultat d'un spot, calculé au besoin sur son représentant canonique.
+
+        Args:
+            kind (str): Type de calcul (ex: "equity", "texture", "cfr").
+            compute (callable): compute(board canonique, ranges canoniques) -> dict de tableaux.
+            per_combo (tuple): Noms des tableaux indexés par combinaison (dernière dimension 1326),
+                remis dans les couleurs d'origine.
+            **parameters: Paramètres qui font partie de la clé (tapis, tailles, itérations...).
+        """
+        key, canonical, canonical_ranges, permutation = spot_key(kind, board, ranges, **parameters)
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = {name: np.asarray(value) for name, value in compute(canonical, canonical_ranges).items()}
+            self.put(key, kind, arrays)
+        if not per_combo:
+            return arrays
+        return {
+            name: restore_combos(value, permutation) if name in per_combo else value
+            for name, value in arrays.items()
+        }
+
+
+_default_store = None
+
+
+def default_store():
+    """Cache partagé de l'application, ouvert sur la base courante (config.DB_PATH)."""
+    global _default_store
+    if _default_store is None or _default_store.db_path != config.DB_PATH:
+        _default_store = SolutionStore()
+    return _default_store